@@ -1,4 +1,14 @@
-from ._cpg import CpgActorController
+from ._batched_cpg import BatchedCpgController
+from ._cpg import CpgActorController, CpgIntegrator
 from ._cpg_network_structure import CpgIndex, CpgNetworkStructure, CpgPair
+from ._csr_matrix import CsrMatrix
 
-__all__ = ["CpgActorController", "CpgIndex", "CpgPair", "CpgNetworkStructure"]
+__all__ = [
+    "BatchedCpgController",
+    "CpgActorController",
+    "CpgIntegrator",
+    "CpgIndex",
+    "CpgPair",
+    "CpgNetworkStructure",
+    "CsrMatrix",
+]
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from typing import List
+
+import numpy as np
+import numpy.typing as npt
+
+from ._cpg import CpgActorController, CpgIntegrator
+
+
+class BatchedCpgController:
+    """
+    Controls many cpg networks at once, such as those of a whole population.
+
+    Behaves like a `CpgActorController` using the default rk45 integrator and float64 for every network,
+    but all networks are stepped together using a single batched matrix product per integration stage.
+    Networks of different sizes are padded with zero states and weights, which do not influence the other states.
+    """
+
+    _states: npt.NDArray[np.float_]  # (networks, max states)
+    _weight_matrices: npt.NDArray[np.float_]  # (networks, max states, max states)
+    _num_output_neurons: npt.NDArray[np.int64]  # (networks,)
+    _dof_ranges: npt.NDArray[np.float_]  # (networks, max outputs). padded with 0.
+    _output_mask: npt.NDArray[
+        np.bool_
+    ]  # (networks, max outputs). True for outputs that exist.
+
+    def __init__(
+        self,
+        states: List[npt.NDArray[np.float_]],
+        num_output_neurons: List[int],
+        weight_matrices: List[npt.NDArray[np.float_]],
+        dof_ranges: List[npt.NDArray[np.float_]],
+    ) -> None:
+        """
+        Every list contains the parameters of one network, as would be passed to `CpgActorController`.
+        """
+        assert len(states) == len(num_output_neurons)
+        assert len(states) == len(weight_matrices)
+        assert len(states) == len(dof_ranges)
+
+        num_networks = len(states)
+        max_states = max((len(state) for state in states), default=0)
+        max_outputs = max(num_output_neurons, default=0)
+
+        self._states = np.zeros((num_networks, max_states))
+        self._weight_matrices = np.zeros((num_networks, max_states, max_states))
+        self._num_output_neurons = np.array(num_output_neurons, dtype=np.int64)
+        self._dof_ranges = np.zeros((num_networks, max_outputs))
+
+        for i, (state, num_outputs, weight_matrix, ranges) in enumerate(
+            zip(states, num_output_neurons, weight_matrices, dof_ranges)
+        ):
+            assert state.ndim == 1
+            assert weight_matrix.shape == (len(state), len(state))
+            assert len(ranges) == num_outputs
+
+            self._states[i, 0 : len(state)] = state
+            self._weight_matrices[i, 0 : len(state), 0 : len(state)] = weight_matrix
+            self._dof_ranges[i, 0:num_outputs] = ranges
+
+        self._output_mask = (
+            np.arange(max_outputs)[np.newaxis, :]
+            < self._num_output_neurons[:, np.newaxis]
+        )
+
+    @classmethod
+    def from_controllers(
+        cls, controllers: List[CpgActorController]
+    ) -> BatchedCpgController:
+        """
+        Create a batch from the current state of existing controllers.
+        The controllers themselves are not modified.
+
+        Only controllers that use the rk45 integrator and float64 are supported,
+        as those are what the batch steps like.
+        A precomputed trajectory only caches rk45 steps, so only the current state is taken from it.
+
+        :raises NotImplementedError: If a controller uses another integrator or dtype.
+        """
+        for controller in controllers:
+            if (
+                controller._integrator != CpgIntegrator.RK45
+                or controller._state.dtype != np.float64
+            ):
+                raise NotImplementedError(
+                    "Only controllers using the rk45 integrator and float64 can be batched."
+                )
+
+        return cls(
+            [controller._state for controller in controllers],
+            [controller._num_output_neurons for controller in controllers],
+            [controller._weight_matrix for controller in controllers],
+            [controller._dof_ranges for controller in controllers],
+        )
+
+    @property
+    def num_networks(self) -> int:
+        return len(self._states)
+
+    @property
+    def num_output_neurons(self) -> List[int]:
+        """
+        Number of dof targets of every network.
+        """
+        num_output_neurons: List[int] = self._num_output_neurons.tolist()
+        return num_output_neurons
+
+    def step(self, dt: float) -> None:
+        """
+        Step all networks.
+
+        :param dt: Time since last step.
+        """
+        self._states = self._rk45(self._states, self._weight_matrices, dt)
+
+    @staticmethod
+    def _rk45(
+        states: npt.NDArray[np.float_], A: npt.NDArray[np.float_], dt: float
+    ) -> npt.NDArray[np.float_]:
+        # same integration as `CpgActorController`, for every network at once
+        def matvec(x: npt.NDArray[np.float_]) -> npt.NDArray[np.float_]:
+            result: npt.NDArray[np.float_] = np.matmul(A, x[:, :, np.newaxis])[:, :, 0]
+            return result
+
+        A1 = matvec(states)
+        A2 = matvec(states + dt / 2 * A1)
+        A3 = matvec(states + dt / 2 * A2)
+        A4 = matvec(states + dt * A3)
+        return states + dt / 6 * (A1 + 2 * (A2 + A3) + A4)
+
+    def get_dof_targets(self) -> npt.NDArray[np.float_]:
+        """
+        Get the dof targets of all networks.
+
+        :returns: (networks, max outputs) array. Row i contains the targets of network i,
+                  padded with nan when that network has less outputs than the largest network.
+        """
+        targets = np.clip(
+            self._states[:, 0 : self._dof_ranges.shape[1]],
+            a_min=-self._dof_ranges,
+            a_max=self._dof_ranges,
+        )
+        targets[~self._output_mask] = np.nan
+        return targets
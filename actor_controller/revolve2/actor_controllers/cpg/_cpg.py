@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import List
+import struct
+from enum import Enum
+from typing import Dict, List, Optional, Union
 
 import numpy as np
 import numpy.typing as npt
@@ -8,58 +10,289 @@ import numpy.typing as npt
 from revolve2.actor_controller import ActorController
 from revolve2.serialization import SerializeError, StaticData
 
+from ._csr_matrix import CsrMatrix
+from ._expm import expm
+
+
+class CpgIntegrator(Enum):
+    """
+    Method used to integrate the cpg dynamics.
+    """
+
+    RK45 = "rk45"
+    """
+    Fourth order runge-kutta. Approximate.
+    """
+    EXPM = "expm"
+    """
+    Multiply by the propagator exp(weight_matrix * dt).
+    Exact, because the dynamics are linear, and only a single matrix-vector product per step.
+    The propagator is calculated once for every distinct dt.
+    """
+
 
 class CpgActorController(ActorController):
     _state: npt.NDArray[np.float_]
     _num_output_neurons: int
     _weight_matrix: npt.NDArray[np.float_]  # nxn matrix matching number of neurons
+    _sparse_weight_matrix: Optional[
+        CsrMatrix
+    ]  # same as `_weight_matrix`. if set, used for stepping instead.
     _dof_ranges: npt.NDArray[np.float_]
+    _integrator: CpgIntegrator
+    _negative_dof_ranges: npt.NDArray[np.float_]
+
+    # preallocated buffers, so stepping does not allocate memory
+    _k1: npt.NDArray[np.float_]  # runge-kutta stages
+    _k2: npt.NDArray[np.float_]
+    _k3: npt.NDArray[np.float_]
+    _k4: npt.NDArray[np.float_]
+    _work: npt.NDArray[np.float_]  # input of the next stage. next state for expm.
+    _dof_targets: npt.NDArray[np.float_]
+
+    _propagators: Dict[float, npt.NDArray[np.float_]]  # dt to exp(weight_matrix * dt)
+
+    # see `precompute_trajectory`. all None if there is no trajectory.
+    _trajectory: Optional[npt.NDArray[np.float_]]  # (steps + 1, states)
+    _trajectory_targets: Optional[npt.NDArray[np.float_]]  # dof targets for every state
+    _trajectory_dt: Optional[float]
+    _trajectory_index: int  # index of the current state in the trajectory
+
+    # number of propagators kept. control usually happens at a fixed rate so one is normally enough.
+    _MAX_PROPAGATORS = 4
+
+    # binary format. header is followed by state, weight matrix and dof ranges as little-endian floats.
+    # (version, integrator, bytes per float, reserved, number of states, number of output neurons)
+    _BINARY_HEADER = struct.Struct("<BBBxII")
+    _BINARY_VERSION = 1
+    _BINARY_INTEGRATORS = [CpgIntegrator.RK45, CpgIntegrator.EXPM]
+
+    # sparse stepping is only faster for large networks with few connections.
+    # with a few connections per state it breaks even at about 300 states.
+    _SPARSE_MIN_STATES = 384
+    _SPARSE_MAX_DENSITY = 0.05
 
     def __init__(
         self,
         state: npt.NDArray[np.float_],
         num_output_neurons: int,
-        weight_matrix: npt.NDArray[np.float_],
+        weight_matrix: Union[npt.NDArray[np.float_], CsrMatrix],
         dof_ranges: npt.NDArray[np.float_],
+        integrator: CpgIntegrator = CpgIntegrator.RK45,
+        dtype: npt.DTypeLike = np.float64,
+        sparse: Optional[bool] = None,
     ):
         """
         First num_output_neurons will be dof targets
+
+        :param integrator: Method used to integrate the dynamics.
+        :param dtype: Floating point type used for the state and weights.
+                      float32 is faster on small devices, at the cost of precision.
+                      The provided arrays are copied, converting them to this type.
+        :param sparse: Whether to step using a sparse weight matrix, for large networks with few connections.
+                       By default this is chosen automatically based on the size and density of the weight matrix.
         """
+        if isinstance(weight_matrix, CsrMatrix):
+            sparse_weight_matrix: Optional[CsrMatrix] = weight_matrix
+            weight_matrix = weight_matrix.to_dense()
+        else:
+            sparse_weight_matrix = None
+
         assert state.ndim == 1
         assert weight_matrix.ndim == 2
         assert weight_matrix.shape[0] == weight_matrix.shape[1]
         assert state.shape[0] == weight_matrix.shape[0]
 
-        self._state = state
+        # state is updated in place so it must not be shared with the caller
+        self._state = np.array(state, dtype=dtype)
         self._num_output_neurons = num_output_neurons
-        self._weight_matrix = weight_matrix
-        self._dof_ranges = dof_ranges
+        self._weight_matrix = np.array(weight_matrix, dtype=dtype)
+        if sparse is None:
+            nnz = (
+                sparse_weight_matrix.nnz
+                if sparse_weight_matrix is not None
+                else np.count_nonzero(weight_matrix)
+            )
+            sparse = (
+                len(weight_matrix) >= self._SPARSE_MIN_STATES
+                and nnz <= self._SPARSE_MAX_DENSITY * weight_matrix.size
+            )
+        if not sparse:
+            self._sparse_weight_matrix = None
+        elif sparse_weight_matrix is not None:
+            self._sparse_weight_matrix = sparse_weight_matrix.astype(dtype)
+        else:
+            self._sparse_weight_matrix = CsrMatrix.from_dense(self._weight_matrix)
+        self._dof_ranges = np.array(dof_ranges, dtype=dtype)
+        self._negative_dof_ranges = -self._dof_ranges
+        self._integrator = integrator
+
+        self._k1 = np.empty_like(self._state)
+        self._k2 = np.empty_like(self._state)
+        self._k3 = np.empty_like(self._state)
+        self._k4 = np.empty_like(self._state)
+        self._work = np.empty_like(self._state)
+        self._dof_targets = np.empty_like(self._dof_ranges)
+
+        self._propagators = {}
+        self._clear_trajectory()
 
     def step(self, dt: float) -> None:
-        self._state = self._rk45(self._state, self._weight_matrix, dt)
+        if self._trajectory is not None:
+            if dt == self._trajectory_dt and self._trajectory_index + 1 < len(
+                self._trajectory
+            ):
+                self._trajectory_index += 1
+                self._state = self._trajectory[self._trajectory_index]
+                return
+            # outside of the precomputed trajectory; continue integrating from the current state.
+            # the state is a view of the trajectory, so copy it before it is modified in place.
+            self._state = self._state.copy()
+            self._clear_trajectory()
 
-    @staticmethod
-    def _rk45(
-        state: npt.NDArray[np.float_], A: npt.NDArray[np.float_], dt: float
-    ) -> npt.NDArray[np.float_]:
+        if self._integrator == CpgIntegrator.EXPM:
+            np.matmul(self._get_propagator(dt), self._state, out=self._work)
+            self._state, self._work = self._work, self._state
+        else:
+            self._rk45(dt)
+
+    def _get_propagator(self, dt: float) -> npt.NDArray[np.float_]:
+        propagator = self._propagators.get(dt)
+        if propagator is None:
+            if len(self._propagators) >= self._MAX_PROPAGATORS:
+                # dicts are ordered, so this removes the oldest
+                del self._propagators[next(iter(self._propagators))]
+            propagator = expm(self._weight_matrix.astype(np.float64) * dt).astype(
+                self._state.dtype
+            )
+            self._propagators[dt] = propagator
+        return propagator
+
+    def precompute_trajectory(self, dt: float, num_steps: int) -> None:
+        """
+        Calculate the states for the next `num_steps` steps of size `dt` ahead of time.
+
+        As long as `step` is called with the same dt, stepping and getting dof targets are table lookups.
+        The results are identical to stepping normally, aside from rounding errors.
+        When stepping with a different dt or past the end of the table, normal integration is resumed.
+
+        :param dt: Time between steps, usually one over the control frequency.
+        :param num_steps: Number of steps to calculate.
+        """
+        assert num_steps >= 0
+
+        # the dynamics are linear so every step is multiplication with the same matrix.
+        # the states are calculated by doubling: the next block of states is
+        # the previous block multiplied by the step matrix to the power of the block size.
+        step_matrix = self._get_step_matrix(dt)
+        trajectory = np.empty(
+            (num_steps + 1, len(self._state)), dtype=self._state.dtype
+        )
+        trajectory[0] = self._state
+        num_calculated = 1
+        power = step_matrix
+        while num_calculated < len(trajectory):
+            num_new = min(num_calculated, len(trajectory) - num_calculated)
+            trajectory[num_calculated : num_calculated + num_new] = np.matmul(
+                trajectory[0:num_new], power.T
+            )
+            num_calculated += num_new
+            power = np.matmul(power, power)
+
+        self._trajectory = trajectory
+        self._trajectory_targets = np.clip(
+            trajectory[:, 0 : self._num_output_neurons],
+            a_min=-self._dof_ranges,
+            a_max=self._dof_ranges,
+        )
+        self._trajectory_dt = dt
+        self._trajectory_index = 0
+
+    def _clear_trajectory(self) -> None:
+        self._trajectory = None
+        self._trajectory_targets = None
+        self._trajectory_dt = None
+        self._trajectory_index = 0
+
+    def _get_step_matrix(self, dt: float) -> npt.NDArray[np.float_]:
+        """
+        Get the matrix that performs a single step of the integrator when multiplied with the state.
+        """
+        if self._integrator == CpgIntegrator.EXPM:
+            return self._get_propagator(dt)
+
+        # a runge-kutta 4 step of a linear system is the taylor polynomial of exp up to fourth order
+        h = self._weight_matrix.astype(np.float64) * dt
+        h2 = np.matmul(h, h)
+        result: npt.NDArray[np.float_] = (
+            np.eye(len(h)) + h + h2 / 2 + np.matmul(h2, h / 6 + h2 / 24)
+        ).astype(self._state.dtype)
+        return result
+
+    def _rk45(self, dt: float) -> None:
+        """
+        Do a fourth order runge-kutta step, updating the state in place.
+        """
         # TODO The scipy implementation of this function is very slow for some reason.
         # investigate the performance and accuracy differences
-        A1: npt.NDArray[np.float_] = np.matmul(
-            A, state
-        )  # TODO matmul doesn't seem to be properly typed.
-        A2: npt.NDArray[np.float_] = np.matmul(A, (state + dt / 2 * A1))
-        A3: npt.NDArray[np.float_] = np.matmul(A, (state + dt / 2 * A2))
-        A4: npt.NDArray[np.float_] = np.matmul(A, (state + dt * A3))
-        return state + dt / 6 * (A1 + 2 * (A2 + A3) + A4)
+        matvec = self._matvec
+        state = self._state
+        k1, k2, k3, k4, work = self._k1, self._k2, self._k3, self._k4, self._work
+
+        matvec(state, k1)
+        np.multiply(k1, dt / 2, out=work)
+        work += state
+        matvec(work, k2)
+        np.multiply(k2, dt / 2, out=work)
+        work += state
+        matvec(work, k3)
+        np.multiply(k3, dt, out=work)
+        work += state
+        matvec(work, k4)
+
+        # state += dt / 6 * (k1 + 2 * (k2 + k3) + k4)
+        k2 += k3
+        k2 *= 2
+        k2 += k1
+        k2 += k4
+        k2 *= dt / 6
+        state += k2
+
+    def _matvec(
+        self, vector: npt.NDArray[np.float_], out: npt.NDArray[np.float_]
+    ) -> None:
+        """
+        Multiply the weight matrix with a vector.
+        """
+        if self._sparse_weight_matrix is not None:
+            self._sparse_weight_matrix.matvec(vector, out=out)
+        else:
+            np.matmul(self._weight_matrix, vector, out=out)
 
     def get_dof_targets(self) -> List[float]:
-        return list(
-            np.clip(
-                self._state[0 : self._num_output_neurons],
-                a_min=-self._dof_ranges,
-                a_max=self._dof_ranges,
-            )
+        dof_targets: List[float] = self.get_dof_targets_array().tolist()
+        return dof_targets
+
+    def get_dof_targets_array(self) -> npt.NDArray[np.float_]:
+        """
+        Get the dof targets without converting them to a list.
+
+        :returns: A preallocated array or a view of the precomputed trajectory.
+                  It is only valid until the next step and must not be modified.
+        """
+        if self._trajectory_targets is not None:
+            targets: npt.NDArray[np.float_] = self._trajectory_targets[
+                self._trajectory_index
+            ]
+            return targets
+
+        np.clip(
+            self._state[0 : self._num_output_neurons],
+            a_min=self._negative_dof_ranges,
+            a_max=self._dof_ranges,
+            out=self._dof_targets,
         )
+        return self._dof_targets
 
     def serialize(self) -> StaticData:
         return {
@@ -67,30 +300,138 @@ class CpgActorController(ActorController):
             "num_output_neurons": self._num_output_neurons,
             "weight_matrix": self._weight_matrix.tolist(),
             "dof_ranges": self._dof_ranges.tolist(),
+            "integrator": self._integrator.value,
+            "dtype": self._state.dtype.name,
         }
 
     @classmethod
     def deserialize(cls, data: StaticData) -> CpgActorController:
+        """
+        Deserialize data created by either `serialize` or `to_bytes`.
+        """
+        if type(data) == bytes:
+            return cls.from_bytes(data)
+
         if (
             not type(data) == dict
             or not "state" in data
-            or not type(data["state"]) == list
-            or not all(type(s) == float for s in data["state"])
             or not "num_output_neurons" in data
             or not type(data["num_output_neurons"]) is int
             or not "weight_matrix" in data
-            or not all(
-                type(r) == list and all(type(c) == float for c in r)
-                for r in data["weight_matrix"]
-            )
             or not "dof_ranges" in data
-            or not all(type(r) == float for r in data["dof_ranges"])
+            # data serialized before integrators were introduced does not contain it
+            or not data.get("integrator", CpgIntegrator.RK45.value)
+            in [integrator.value for integrator in CpgIntegrator]
+            or not data.get("dtype", "float64") in ["float32", "float64"]
+        ):
+            raise SerializeError()
+
+        state = cls._float_array_from_list(data["state"])
+        weight_matrix = cls._float_array_from_list(data["weight_matrix"])
+        dof_ranges = cls._float_array_from_list(data["dof_ranges"])
+        if (
+            state is None
+            or state.ndim != 1
+            or weight_matrix is None
+            or weight_matrix.size != len(state) ** 2
+            or (weight_matrix.ndim != 2 and weight_matrix.size != 0)
+            or dof_ranges is None
+            or dof_ranges.ndim != 1
+            or not 0 <= data["num_output_neurons"] <= len(state)
+            or len(dof_ranges) != data["num_output_neurons"]
         ):
             raise SerializeError()
 
         return CpgActorController(
-            np.array(data["state"]),
+            state,
             data["num_output_neurons"],
-            np.array(data["weight_matrix"]),
-            np.array(data["dof_ranges"]),
+            weight_matrix.reshape(len(state), len(state)),
+            dof_ranges,
+            CpgIntegrator(data.get("integrator", CpgIntegrator.RK45.value)),
+            np.dtype(data.get("dtype", "float64")),
+        )
+
+    @staticmethod
+    def _float_array_from_list(data: StaticData) -> Optional[npt.NDArray[np.float_]]:
+        """
+        Convert (nested) lists of floats to an array, checking the types of all values at once.
+
+        :returns: The array, or None if the data is not (nested) lists of floats.
+        """
+        if type(data) != list:
+            return None
+        try:
+            array = np.array(data)
+        except ValueError:  # lists of different lengths
+            return None
+        # any value that is not a float results in another dtype, except for integers mixed with floats.
+        if array.dtype != np.float64 and array.size != 0:
+            return None
+        return array.astype(np.float64)
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize to a compact binary form.
+        Much faster than `serialize` for large networks.
+
+        :returns: The serialized controller. Can be deserialized with `from_bytes` or `deserialize`.
+        """
+        dtype = self._state.dtype.newbyteorder("<")
+        return b"".join(
+            [
+                self._BINARY_HEADER.pack(
+                    self._BINARY_VERSION,
+                    self._BINARY_INTEGRATORS.index(self._integrator),
+                    dtype.itemsize,
+                    len(self._state),
+                    self._num_output_neurons,
+                ),
+                self._state.astype(dtype, copy=False).tobytes(),
+                self._weight_matrix.astype(dtype, copy=False).tobytes(),
+                self._dof_ranges.astype(dtype, copy=False).tobytes(),
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> CpgActorController:
+        """
+        Deserialize data created by `to_bytes`.
+
+        :param data: The serialized controller.
+        :returns: The controller.
+        :raises SerializeError: If the data is not a valid serialized controller.
+        """
+        if len(data) < cls._BINARY_HEADER.size:
+            raise SerializeError()
+        (
+            version,
+            integrator,
+            float_size,
+            num_states,
+            num_output_neurons,
+        ) = cls._BINARY_HEADER.unpack_from(data)
+        if (
+            version != cls._BINARY_VERSION
+            or integrator >= len(cls._BINARY_INTEGRATORS)
+            or float_size not in [4, 8]
+            or num_output_neurons > num_states
+            or len(data)
+            != cls._BINARY_HEADER.size
+            + float_size * (num_states + num_states**2 + num_output_neurons)
+        ):
+            raise SerializeError()
+
+        dtype = np.dtype(f"<f{float_size}")
+        state_offset = cls._BINARY_HEADER.size
+        weights_offset = state_offset + float_size * num_states
+        ranges_offset = weights_offset + float_size * num_states**2
+        return CpgActorController(
+            np.frombuffer(data, dtype, num_states, state_offset),
+            num_output_neurons,
+            np.frombuffer(data, dtype, num_states**2, weights_offset).reshape(
+                num_states, num_states
+            ),
+            np.frombuffer(data, dtype, num_output_neurons, ranges_offset),
+            cls._BINARY_INTEGRATORS[integrator],
+            dtype.newbyteorder("="),
         )
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
-from typing import Dict, List, Set
+from typing import Dict, List, Set, Tuple
 
 import numpy as np
 import numpy.typing as npt
 
+from ._csr_matrix import CsrMatrix
+
 
 @dataclass(frozen=True)
 class CpgIndex:
@@ -48,24 +50,98 @@ class CpgNetworkStructure:
     ) -> npt.NDArray[np.float_]:
         state_size = self.num_cpgs * 2
 
-        assert set(internal_weights.keys()) == set(self.cpgs)
-        assert set(external_weights.keys()) == self.connections
-
+        rows, columns, values = self._make_weight_coordinates(
+            internal_weights, external_weights
+        )
         weight_matrix = np.zeros((state_size, state_size))
+        weight_matrix[rows, columns] = values
 
-        for cpg, weight in internal_weights.items():
-            weight_matrix[cpg.index][self.num_cpgs + cpg.index] = weight
-            weight_matrix[self.num_cpgs + cpg.index][cpg.index] = -weight
+        return weight_matrix
 
-        for cpg_pair, weight in external_weights.items():
-            weight_matrix[cpg_pair.cpg_index_lowest.index][
-                cpg_pair.cpg_index_highest.index
-            ] = weight
-            weight_matrix[cpg_pair.cpg_index_highest.index][
-                cpg_pair.cpg_index_lowest.index
-            ] = -weight
+    def make_sparse_weight_matrix(
+        self,
+        internal_weights: Dict[CpgIndex, float],
+        external_weights: Dict[CpgPair, float],
+    ) -> CsrMatrix:
+        """
+        Same as `make_weight_matrix`, but only stores the weights that can be nonzero.
+        Its size is linear in the number of cpgs and connections instead of quadratic.
+        """
+        rows, columns, values = self._make_weight_coordinates(
+            internal_weights, external_weights
+        )
+        return CsrMatrix.from_coordinates(self.num_states, rows, columns, values)
+
+    def _make_weight_coordinates(
+        self,
+        internal_weights: Dict[CpgIndex, float],
+        external_weights: Dict[CpgPair, float],
+    ) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.float_]]:
+        """
+        Get the row, column and value of every weight in the weight matrix.
+        """
+        assert set(internal_weights.keys()) == set(self.cpgs)
+        assert set(external_weights.keys()) == self.connections
 
-        return weight_matrix
+        rows, columns, sources, signs = self._make_weight_layout(
+            list(internal_weights.keys()),
+            list(external_weights.keys()),
+            len(internal_weights),
+        )
+        weights = np.array(
+            list(internal_weights.values()) + list(external_weights.values()),
+            dtype=np.float64,
+        )
+        return rows, columns, weights[sources] * signs
+
+    def _make_weight_layout(
+        self, cpgs: List[CpgIndex], pairs: List[CpgPair], first_external_weight: int
+    ) -> Tuple[
+        npt.NDArray[np.int64],
+        npt.NDArray[np.int64],
+        npt.NDArray[np.int64],
+        npt.NDArray[np.float_],
+    ]:
+        """
+        Get where weights go in the weight matrix.
+
+        :param cpgs: Cpgs with an internal weight, in order of their weights. Their weights start at index 0.
+        :param pairs: Connected cpgs with an external weight, in order of their weights.
+        :param first_external_weight: Index of the weight of the first pair.
+        :returns: (row, column, index of the weight, sign of the weight) for every nonzero entry in the weight matrix.
+        """
+        cpg_indices = np.array([cpg.index for cpg in cpgs], dtype=np.int64)
+        lowest = np.array(
+            [pair.cpg_index_lowest.index for pair in pairs], dtype=np.int64
+        )
+        highest = np.array(
+            [pair.cpg_index_highest.index for pair in pairs], dtype=np.int64
+        )
+        internal_sources = np.arange(len(cpgs))
+        external_sources = np.arange(
+            first_external_weight, first_external_weight + len(pairs)
+        )
+
+        # internal weights connect the two neurons of a cpg, external weights the first neurons of two cpgs.
+        # the opposite direction has the negated weight.
+        rows = np.concatenate(
+            [cpg_indices, self.num_cpgs + cpg_indices, lowest, highest]
+        )
+        columns = np.concatenate(
+            [self.num_cpgs + cpg_indices, cpg_indices, highest, lowest]
+        )
+        sources = np.concatenate(
+            [internal_sources, internal_sources, external_sources, external_sources]
+        )
+        signs = np.concatenate(
+            [
+                np.ones(len(cpgs)),
+                -np.ones(len(cpgs)),
+                np.ones(len(pairs)),
+                -np.ones(len(pairs)),
+            ]
+        )
+        return rows, columns, sources, signs
 
     @property
     def num_params(self) -> int:
@@ -76,13 +152,34 @@ class CpgNetworkStructure:
     ) -> npt.NDArray[np.float_]:
         assert len(params) == self.num_params
 
-        internal_weights = {cpg: weight for cpg, weight in zip(self.cpgs, params)}
-
-        external_weights = {
-            pair: weight for pair, weight in zip(self.connections, params)
-        }
+        weight_matrix: npt.NDArray[np.float_] = self.make_weight_matrices_from_params(
+            np.array([params])
+        )[0]
+        return weight_matrix
 
-        return self.make_weight_matrix(internal_weights, external_weights)
+    def make_weight_matrices_from_params(
+        self, params: npt.NDArray[np.float_]
+    ) -> npt.NDArray[np.float_]:
+        """
+        Create the weight matrices for many parameter sets at once,
+        such as for all individuals of a population.
+        Each matrix is the same as would be created by `make_weight_matrix_from_params`.
+
+        :param params: (parameter sets, num_params) array.
+        :returns: (parameter sets, num_states, num_states) array.
+        """
+        assert params.ndim == 2
+        assert params.shape[1] == self.num_params
+
+        # internal weights are the first parameters.
+        # external weights also start at the first parameter, in iteration order of the connections.
+        rows, columns, sources, signs = self._make_weight_layout(
+            self.cpgs, list(self.connections), 0
+        )
+
+        weight_matrices = np.zeros((len(params), self.num_states, self.num_states))
+        weight_matrices[:, rows, columns] = params[:, sources] * signs
+        return weight_matrices
 
     @property
     def num_states(self) -> int:
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+
+class CsrMatrix:
+    """
+    Square sparse matrix in compressed sparse row format.
+
+    Only supports what is required to step cpg networks,
+    so this package does not have to depend on scipy.
+    """
+
+    size: int  # number of rows and columns
+    data: npt.NDArray[np.float_]  # nonzero values, row by row
+    indices: npt.NDArray[np.int64]  # column of every value
+    indptr: npt.NDArray[
+        np.int64
+    ]  # index in `data` of the first value of every row, followed by the number of values
+    _rows: npt.NDArray[np.int64]  # row of every value
+
+    # preallocated buffers, so `matvec` does not allocate memory
+    _products: npt.NDArray[
+        np.float_
+    ]  # product of every value with its vector entry, followed by a zero
+    _row_bounds: npt.NDArray[
+        np.int64
+    ]  # (start, end) in `_products` of every row. empty rows point at the trailing zero.
+    _row_sums: npt.NDArray[
+        np.float_
+    ]  # sum of every row, interleaved with unused values
+
+    def __init__(
+        self,
+        size: int,
+        data: npt.NDArray[np.float_],
+        indices: npt.NDArray[np.int64],
+        indptr: npt.NDArray[np.int64],
+    ) -> None:
+        assert data.ndim == 1
+        assert indices.shape == data.shape
+        assert indptr.shape == (size + 1,)
+
+        self.size = size
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self._rows = np.repeat(np.arange(size), np.diff(indptr))
+
+        self._products = np.zeros(len(data) + 1, dtype=data.dtype)
+        empty = indptr[:-1] == indptr[1:]
+        self._row_bounds = np.stack(
+            [
+                np.where(empty, len(data), indptr[:-1]),
+                np.where(empty, len(data), indptr[1:]),
+            ],
+            axis=1,
+        ).reshape(-1)
+        self._row_sums = np.empty(2 * size, dtype=data.dtype)
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        size: int,
+        rows: npt.NDArray[np.int64],
+        columns: npt.NDArray[np.int64],
+        values: npt.NDArray[np.float_],
+    ) -> CsrMatrix:
+        """
+        Create a matrix from its nonzero values.
+
+        :param size: Number of rows and columns.
+        :param rows: Row of every value.
+        :param columns: Column of every value. Every (row, column) must be unique.
+        :param values: The values.
+        """
+        order = np.lexsort((columns, rows))
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+        return cls(
+            size,
+            np.asarray(values)[order],
+            np.asarray(columns, dtype=np.int64)[order],
+            indptr,
+        )
+
+    @classmethod
+    def from_dense(cls, matrix: npt.NDArray[np.float_]) -> CsrMatrix:
+        assert matrix.ndim == 2 and matrix.shape[0] == matrix.shape[1]
+
+        rows, columns = np.nonzero(matrix)
+        return cls.from_coordinates(len(matrix), rows, columns, matrix[rows, columns])
+
+    def to_dense(self) -> npt.NDArray[np.float_]:
+        matrix = np.zeros((self.size, self.size), dtype=self.data.dtype)
+        matrix[self._rows, self.indices] = self.data
+        return matrix
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.size, self.size)
+
+    @property
+    def nnz(self) -> int:
+        """
+        Number of stored values.
+        """
+        return len(self.data)
+
+    def astype(self, dtype: npt.DTypeLike) -> CsrMatrix:
+        return CsrMatrix(self.size, self.data.astype(dtype), self.indices, self.indptr)
+
+    def matvec(
+        self,
+        vector: npt.NDArray[np.float_],
+        out: Optional[npt.NDArray[np.float_]] = None,
+    ) -> npt.NDArray[np.float_]:
+        """
+        Multiply the matrix with a vector.
+
+        :param vector: The vector.
+        :param out: If provided, the result is written to this array.
+        :returns: The product.
+        """
+        if out is None:
+            out = np.empty(self.size, dtype=self.data.dtype)
+        if self.size == 0:
+            return out
+
+        # multiply every value with its column's entry in the vector and sum them per row.
+        # reduceat sums from every bound up to the next one, so every even result is a row sum.
+        # when a range is empty it returns the value at its start instead, which is the trailing zero.
+        products = self._products[0:-1]
+        np.take(vector, self.indices, out=products, mode="clip")
+        products *= self.data
+        np.add.reduceat(self._products, self._row_bounds, out=self._row_sums)
+        out[...] = self._row_sums[0::2]
+        return out
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+import numpy.typing as npt
+
+# coefficients of the degree 13 pade approximant of exp
+_PADE_13 = (
+    64764752532480000.0,
+    32382376266240000.0,
+    7771770303897600.0,
+    1187353796428800.0,
+    129060195264000.0,
+    10559470521600.0,
+    670442572800.0,
+    33522128640.0,
+    1323241920.0,
+    40840800.0,
+    960960.0,
+    16380.0,
+    182.0,
+    1.0,
+)
+# largest 1-norm for which the degree 13 approximant is accurate to double precision
+_THETA_13 = 5.371920351148152
+
+
+def expm(matrix: npt.NDArray[np.float_]) -> npt.NDArray[np.float_]:
+    """
+    Calculate the matrix exponential using scaling and squaring.
+    See Higham, N. J. (2005). The scaling and squaring method for the matrix exponential revisited.
+
+    Implemented here because this package only depends on numpy.
+
+    :param matrix: Square matrix.
+    :returns: exp(matrix)
+    """
+    assert matrix.ndim == 2 and matrix.shape[0] == matrix.shape[1]
+
+    norm = np.linalg.norm(matrix, 1) if matrix.size > 0 else 0.0
+    squarings = max(0, math.ceil(math.log2(norm / _THETA_13))) if norm > 0 else 0
+    a = matrix / 2**squarings
+
+    b = _PADE_13
+    ident = np.eye(len(a))
+    a2 = a @ a
+    a4 = a2 @ a2
+    a6 = a4 @ a2
+    u = a @ (
+        a6 @ (b[13] * a6 + b[11] * a4 + b[9] * a2)
+        + b[7] * a6
+        + b[5] * a4
+        + b[3] * a2
+        + b[1] * ident
+    )
+    v = (
+        a6 @ (b[12] * a6 + b[10] * a4 + b[8] * a2)
+        + b[6] * a6
+        + b[4] * a4
+        + b[2] * a2
+        + b[0] * ident
+    )
+    result: npt.NDArray[np.float_] = np.linalg.solve(v - u, v + u)
+
+    for _ in range(squarings):
+        result = result @ result
+    return result
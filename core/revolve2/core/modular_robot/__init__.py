@@ -1,8 +1,9 @@
 from ._active_hinge import ActiveHinge
 from ._body import Body
+from ._bone import Bone
 from ._brain import Brain
 from ._brick import Brick
-from ._bone import Bone
+from ._compact_body import CompactBody
 from ._core import Core
 from ._modular_robot import ModularRobot
 from ._module import Module
@@ -14,6 +15,7 @@ __all__ = [
     "Bone",
     "Brain",
     "Brick",
+    "CompactBody",
     "Core",
     "ModularRobot",
     "Module",
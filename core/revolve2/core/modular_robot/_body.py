@@ -1,29 +1,44 @@
+from __future__ import annotations
+
+import hashlib
 import math
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
-from pyrr import Quaternion, Vector3
+import numpy.typing as npt
+from pyrr import Vector3
 
-from revolve2.core.physics.actor import Actor, Collision, Joint, RigidBody, Visual
+from revolve2.core.physics.actor import Actor
 
 from ._active_hinge import ActiveHinge
 from ._brick import Brick
+from ._compact_body import CompactBody
 from ._core import Core
 from ._module import Module
+from ._module_graph import ModuleGraph
 from ._not_finalized_error import NotFinalizedError
 
 
 class Body:
     core: Core
     _is_finalized: bool
+    _grid_positions: Optional[
+        npt.NDArray[np.int64]
+    ]  # grid position of every module, by id. calculated when first required.
+    _canonical_form: Optional[
+        str
+    ]  # calculated when first required, but only kept once finalized.
 
     def __init__(self) -> None:
         self.core = Core(0.0)
         self._is_finalized = False
+        self._grid_positions = None
+        self._canonical_form = None
 
     def finalize(self) -> None:
         """
-        Finalize the body by assigning ids to all modules.
+        Finalize the body by assigning ids to all modules
+        and building the adjacency of the modules.
         """
         if self._is_finalized:
             raise RuntimeError("Cannot finalize twice.")
@@ -43,7 +58,46 @@ class Body:
         """
         if not self.is_finalized:
             raise NotFinalizedError()
-        return _ActorBuilder().build(self)
+        return self.to_compact().to_actor()
+
+    def to_compact(self) -> CompactBody:
+        """
+        Convert this body to its array representation.
+        The body does not have to be finalized.
+        """
+        return _Compactor().make(self)
+
+    @classmethod
+    def from_compact(cls, compact: CompactBody) -> Body:
+        """
+        Create a body from its array representation.
+        The returned body is not finalized.
+        """
+        modules: List[Module] = []
+        for module_type, parent, parent_slot, rotation in zip(
+            compact.types.tolist(),
+            compact.parents.tolist(),
+            compact.parent_slots.tolist(),
+            compact.rotations.tolist(),
+        ):
+            module: Module
+            if module_type == CompactBody.CORE:
+                module = Core(rotation)
+            elif module_type == CompactBody.BRICK:
+                module = Brick(rotation)
+            elif module_type == CompactBody.ACTIVE_HINGE:
+                module = ActiveHinge(rotation)
+            else:
+                raise NotImplementedError("Module type not implemented")
+            if parent != -1:
+                modules[parent].children[parent_slot] = module
+            modules.append(module)
+
+        core = modules[0]
+        assert isinstance(core, Core)
+        body = cls()
+        body.core = core
+        return body
 
     def find_active_hinges(self) -> List[ActiveHinge]:
         """
@@ -60,72 +114,71 @@ class Body:
         Calculate the position of this module in a 3d grid with the core as center.
         The distance between all modules is assumed to be one grid cell.
         All module angles must be multiples of 90 degrees.
+
+        The positions of all modules are calculated together the first time this is called.
+        """
+        if not self.is_finalized:
+            raise NotFinalizedError()
+
+        if self._grid_positions is None:
+            self._grid_positions = _GridMapper().map(self)
+        return Vector3(self._grid_positions[module.id].astype(np.float64))
+
+    def structural_hash(self) -> str:
         """
+        Calculate a hash of the structure of this body.
 
-        # TODO make this into a function that maps the complete robot to a grid
+        Bodies with the same hash result in the same actor, with the same joints in the same order,
+        so the same controller parameters apply to them.
+        The rotation of the core is not used, as it does not influence the robot,
+        and rotations are compared modulo a full turn.
+        A brick rotated by half a turn with its left and right children swapped results in the same robot,
+        but its joints are in a different order, so it does not have the same hash.
 
-        position = Vector3()
+        The hash is the same in every process, so it can be stored and compared between runs.
 
-        parent = module._parent
-        child_index = module._parent_child_index
-        while parent is not None and child_index is not None:
-            child = parent.children[child_index]
-            assert child is not None
-            assert np.isclose(child.rotation % (math.pi / 2.0), 0.0)
+        :returns: Hexadecimal sha256 hash.
+        """
+        return hashlib.sha256(self._get_canonical_form().encode()).hexdigest()
 
-            position = Quaternion.from_eulers((child.rotation, 0.0, 0.0)) * position
-            position += Vector3([1, 0, 0])
-            rotation: Quaternion
-            if isinstance(parent, Core):
-                if child_index == Core.FRONT:
-                    rotation = Quaternion.from_eulers((0.0, 0.0, 0.0))
-                elif child_index == Core.LEFT:
-                    rotation = Quaternion.from_eulers((0.0, 0.0, math.pi / 2.0 * 1))
-                elif child_index == Core.BACK:
-                    rotation = Quaternion.from_eulers((0.0, 0.0, math.pi / 2.0 * 2))
-                elif child_index == Core.RIGHT:
-                    rotation = Quaternion.from_eulers((0.0, 0.0, math.pi / 2.0 * 3))
-                else:
-                    raise NotImplementedError()
-            elif isinstance(parent, Brick):
-                if child_index == Brick.FRONT:
-                    rotation = Quaternion.from_eulers((0.0, 0.0, 0.0))
-                elif child_index == Brick.LEFT:
-                    rotation = Quaternion.from_eulers((0.0, 0.0, math.pi / 2.0 * 1))
-                elif child_index == Brick.RIGHT:
-                    rotation = Quaternion.from_eulers((0.0, 0.0, math.pi / 2.0 * 3))
-                else:
-                    raise NotImplementedError()
-            elif isinstance(parent, ActiveHinge):
-                if child_index == ActiveHinge.ATTACHMENT:
-                    rotation = Quaternion()
-                else:
-                    raise NotImplementedError()
-            else:
-                raise NotImplementedError()
-            position = rotation * position
-            position = Vector3.round(position)
+    def is_structurally_equal(self, other: Body) -> bool:
+        """
+        Check if this body results in the same robot as another body.
+        See `structural_hash`.
 
-            child_index = parent._parent_child_index
-            parent = parent._parent
+        :param other: The other body.
+        :returns: Whether the structures are equal.
+        """
+        return self._get_canonical_form() == other._get_canonical_form()
 
-        return position
+    def _get_canonical_form(self) -> str:
+        if self._canonical_form is not None:
+            return self._canonical_form
+        canonical_form = _CanonicalFormMaker().make(self)
+        # modules can still be changed before the body is finalized
+        if self.is_finalized:
+            self._canonical_form = canonical_form
+        return canonical_form
 
 
 class _Finalizer:
     _body: Body
-    _next_id: int
+    _modules: List[Module]  # all modules, by id
 
     def __init__(self, body: Body) -> None:
         self._body = body
-        self._next_id = 0
+        self._modules = []
 
     def finalize(self) -> None:
         self._finalize_recur(self._body.core)
 
+        graph = ModuleGraph(self._modules)
+        for module in self._modules:
+            module._graph = graph
+
     def _finalize_recur(self, module: Module) -> None:
-        module.id = self._next_id
-        self._next_id += 1
+        module.id = len(self._modules)
+        self._modules.append(module)
         for i, child in enumerate(module.children):
             if child is not None:
                 child._parent = module
@@ -133,295 +186,158 @@ class _Finalizer:
                 self._finalize_recur(child)
 
 
-class _ActorBuilder:
-    _STATIC_FRICTION = 1.0
-    _DYNAMIC_FRICTION = 1.0
+class _Compactor:
+    _types: List[int]
+    _parents: List[int]
+    _parent_slots: List[int]
+    _rotations: List[float]
 
-    robot: Actor
-    dof_ids: List[int]
+    def make(self, body: Body) -> CompactBody:
+        self._types = []
+        self._parents = []
+        self._parent_slots = []
+        self._rotations = []
 
-    def build(self, body: Body) -> Tuple[Actor, List[int]]:
-        self.robot = Actor([], [])
-        self.dof_ids = []
+        self._make_recur(body.core, -1, -1)
 
-        origin_body = RigidBody(
-            "origin",
-            Vector3(),
-            Quaternion(),
-            self._STATIC_FRICTION,
-            self._DYNAMIC_FRICTION,
+        return CompactBody(
+            self._types, self._parents, self._parent_slots, self._rotations
         )
-        self.robot.bodies.append(origin_body)
 
-        self._make_module(body.core, origin_body, "origin", Vector3(), Quaternion())
-
-        return (self.robot, self.dof_ids)
-
-    def _make_module(
-        self,
-        module: Module,
-        body: RigidBody,
-        name_prefix: str,
-        attachment_offset: Vector3,
-        orientation: Quaternion,
-    ) -> None:
+    def _make_recur(self, module: Module, parent: int, parent_slot: int) -> None:
+        index = len(self._types)
         if isinstance(module, Core):
-            self._make_core(
-                module,
-                body,
-                name_prefix,
-                attachment_offset,
-                orientation,
-            )
+            self._types.append(CompactBody.CORE)
         elif isinstance(module, Brick):
-            self._make_brick(
-                module,
-                body,
-                name_prefix,
-                attachment_offset,
-                orientation,
-            )
+            self._types.append(CompactBody.BRICK)
         elif isinstance(module, ActiveHinge):
-            self._make_active_hinge(
-                module,
-                body,
-                name_prefix,
-                attachment_offset,
-                orientation,
-            )
+            self._types.append(CompactBody.ACTIVE_HINGE)
         else:
             raise NotImplementedError("Module type not implemented")
+        self._parents.append(parent)
+        self._parent_slots.append(parent_slot)
+        self._rotations.append(module.rotation)
 
-    def _make_core(
-        self,
-        module: Core,
-        body: RigidBody,
-        name_prefix: str,
-        attachment_point: Vector3,
-        orientation: Quaternion,
-    ) -> None:
-        BOUNDING_BOX = Vector3([0.089, 0.089, 0.0603])  # meter
-        MASS = 0.250  # kg
-        CHILD_OFFSET = 0.089 / 2.0  # meter
-
-        # attachment position is always at center of core
-        position = attachment_point
-
-        body.collisions.append(
-            Collision(
-                f"{name_prefix}_core_collision",
-                position,
-                orientation,
-                MASS,
-                BOUNDING_BOX,
-            )
-        )
-        body.visuals.append(
-            Visual(
-                f"{name_prefix}_core_visual",
-                position,
-                orientation,
-                "model://rg_robot/meshes/CoreComponent.dae",
-                (1.0, 1.0, 0.0),
-            )
-        )
-
-        for (name_suffix, child_index, angle) in [
-            ("front", Core.FRONT, 0.0),
-            ("back", Core.BACK, math.pi),
-            ("left", Core.LEFT, math.pi / 2.0),
-            ("right", Core.RIGHT, math.pi / 2.0 * 3),
-        ]:
-            child = module.children[child_index]
+        for slot, child in enumerate(module.children):
             if child is not None:
-                rotation = (
-                    orientation
-                    * Quaternion.from_eulers([0.0, 0.0, angle])
-                    * Quaternion.from_eulers([child.rotation, 0, 0])
-                )
-
-                self._make_module(
-                    child,
-                    body,
-                    f"{name_prefix}_{name_suffix}",
-                    position + rotation * Vector3([CHILD_OFFSET, 0.0, 0.0]),
-                    rotation,
-                )
-
-    def _make_brick(
-        self,
-        module: Brick,
-        body: RigidBody,
-        name_prefix: str,
-        attachment_point: Vector3,
-        orientation: Quaternion,
-    ) -> None:
-        BOUNDING_BOX = Vector3([0.06288625, 0.06288625, 0.0603])  # meter
-        MASS = 0.030  # kg
-        CHILD_OFFSET = 0.06288625 / 2.0  # meter
+                self._make_recur(child, index, slot)
 
-        position = attachment_point + orientation * Vector3(
-            [BOUNDING_BOX[0] / 2.0, 0.0, 0.0]
-        )
 
-        body.collisions.append(
-            Collision(
-                f"{name_prefix}_brick_collision",
-                position,
-                orientation,
-                MASS,
-                BOUNDING_BOX,
-            )
-        )
-        body.visuals.append(
-            Visual(
-                f"{name_prefix}_brick_visual",
-                position,
-                orientation,
-                "model://rg_robot/meshes/FixedBrick.dae",
-                (1.0, 0.0, 0.0),
-            )
+class _GridMapper:
+    """
+    Calculates the grid positions of all modules in a single traversal from the core.
+    All rotations are multiples of 90 degrees, so they are represented by exact integer matrices.
+    """
+
+    # number of quarter turns around the z axis of the attachment slots of every module type
+    _SLOT_TURNS: Dict[type, Dict[int, int]] = {
+        Core: {Core.FRONT: 0, Core.LEFT: 1, Core.BACK: 2, Core.RIGHT: 3},
+        Brick: {Brick.FRONT: 0, Brick.LEFT: 1, Brick.RIGHT: 3},
+        ActiveHinge: {ActiveHinge.ATTACHMENT: 0},
+    }
+
+    _ids: List[int]
+    _positions: List[npt.NDArray[np.int64]]
+
+    def map(self, body: Body) -> npt.NDArray[np.int64]:
+        """
+        :returns: (modules, 3) array with the grid position of every module, by id.
+        """
+        self._ids = []
+        self._positions = []
+        self._map_recur(
+            body.core, np.identity(3, dtype=np.int64), np.zeros(3, np.int64)
         )
 
-        for (name_suffix, child_index, angle) in [
-            ("front", Brick.FRONT, 0.0),
-            ("left", Brick.LEFT, math.pi / 2.0),
-            ("right", Brick.RIGHT, math.pi / 2.0 * 3),
-        ]:
-            child = module.children[child_index]
-            if child is not None:
-                rotation = (
-                    orientation
-                    * Quaternion.from_eulers([0.0, 0.0, angle])
-                    * Quaternion.from_eulers([child.rotation, 0, 0])
-                )
-
-                self._make_module(
-                    child,
-                    body,
-                    f"{name_prefix}_{name_suffix}",
-                    position + rotation * Vector3([CHILD_OFFSET, 0.0, 0.0]),
-                    rotation,
-                )
-
-    def _make_active_hinge(
+        positions = np.zeros((len(self._ids), 3), dtype=np.int64)
+        positions[self._ids] = self._positions
+        return positions
+
+    def _map_recur(
         self,
-        module: ActiveHinge,
-        body: RigidBody,
-        name_prefix: str,
-        attachment_point: Vector3,
-        orientation: Quaternion,
+        module: Module,
+        orientation: npt.NDArray[np.int64],
+        position: npt.NDArray[np.int64],
     ) -> None:
-        FRAME_BOUNDING_BOX = Vector3([0.04525, 0.053, 0.0165891])  # meter
-        SERVO1_BOUNDING_BOX = Vector3([0.0583, 0.0512, 0.020])  # meter
-        SERVO2_BOUNDING_BOX = Vector3([0.002, 0.053, 0.053])  # meter
+        """
+        :param orientation: Rotation from the module's frame to the core's frame.
+        :param position: Position of the module in the core's frame.
+        """
+        self._ids.append(module.id)
+        self._positions.append(position)
+
+        slot_turns = self._SLOT_TURNS.get(type(module))
+        if slot_turns is None:
+            raise NotImplementedError()
+
+        for child_index, child in enumerate(module.children):
+            if child is None:
+                continue
+            turns = slot_turns.get(child_index)
+            if turns is None:
+                raise NotImplementedError()
+            assert np.isclose(child.rotation % (math.pi / 2.0), 0.0)
 
-        FRAME_MASS = 0.011  # kg
-        SERVO1_MASS = 0.058  # kg
-        SERVO2_MASS = 0.0  # kg. we simplify by only using the weight of the first box
+            # a child is one cell along the x axis of its slot, and rolled around that axis by its rotation.
+            slot_orientation = orientation @ self._rotation_z(turns)
+            self._map_recur(
+                child,
+                slot_orientation
+                @ self._rotation_x(round(child.rotation / (math.pi / 2.0))),
+                position + slot_orientation[:, 0],
+            )
 
-        SERVO_OFFSET = 0.0299  # meter. distance from frame to servo
-        JOINT_OFFSET = 0.0119  # meter. distance from frame to joint
+    @staticmethod
+    def _rotation_x(quarter_turns: int) -> npt.NDArray[np.int64]:
+        cos, sin = _QUARTER_TURN_COS_SIN[quarter_turns % 4]
+        return np.array([[1, 0, 0], [0, cos, -sin], [0, sin, cos]], dtype=np.int64)
 
-        SERVO_BBOX2_POSITION = Vector3(
-            [SERVO1_BOUNDING_BOX[0] / 2.0 + SERVO2_BOUNDING_BOX[0] / 2.0, 0.0, 0.0]
-        )
+    @staticmethod
+    def _rotation_z(quarter_turns: int) -> npt.NDArray[np.int64]:
+        cos, sin = _QUARTER_TURN_COS_SIN[quarter_turns % 4]
+        return np.array([[cos, -sin, 0], [sin, cos, 0], [0, 0, 1]], dtype=np.int64)
 
-        ATTACHMENT_OFFSET = SERVO1_BOUNDING_BOX[0] / 2.0 + SERVO2_BOUNDING_BOX[0]
 
-        frame_position = attachment_point + orientation * Vector3(
-            [FRAME_BOUNDING_BOX[0] / 2.0, 0.0, 0.0]
-        )
-        servo_body_position = body.position + body.orientation * (
-            frame_position + orientation * Vector3([SERVO_OFFSET, 0.0, 0.0])
-        )
-        servo_body_orientation = body.orientation * orientation
-        joint_position = body.position + body.orientation * (
-            frame_position + orientation * Vector3([JOINT_OFFSET, 0.0, 0.0])
-        )
-        joint_orientation = body.orientation * orientation
-
-        body.collisions.append(
-            Collision(
-                f"{name_prefix}_activehingeframe_collision",
-                frame_position,
-                orientation,
-                FRAME_MASS,
-                FRAME_BOUNDING_BOX,
-            )
-        )
-        body.visuals.append(
-            Visual(
-                f"{name_prefix}_activehingeframe_visual",
-                frame_position,
-                orientation,
-                "model://rg_robot/meshes/ActiveHinge_Frame.dae",
-                (0.0, 1.0, 0.0),
-            )
-        )
+# (cos, sin) of 0, 1, 2 and 3 quarter turns
+_QUARTER_TURN_COS_SIN = [(1, 0), (0, 1), (-1, 0), (0, -1)]
 
-        next_body = RigidBody(
-            f"{name_prefix}_activehinge",
-            servo_body_position,
-            servo_body_orientation,
-            self._STATIC_FRICTION,
-            self._DYNAMIC_FRICTION,
-        )
-        self.robot.bodies.append(next_body)
-        self.robot.joints.append(
-            Joint(
-                f"{name_prefix}_activehinge",
-                body,
-                next_body,
-                joint_position,
-                joint_orientation,
-                Vector3([0.0, 1.0, 0.0]),
-                range=module.RANGE,
-                effort=module.EFFORT,
-                velocity=module.VELOCITY,
-            )
-        )
-        self.dof_ids.append(module.id)
-
-        next_body.collisions.append(
-            Collision(
-                f"{name_prefix}_activehingemotor_collision1",
-                Vector3(),
-                Quaternion(),
-                SERVO1_MASS,
-                SERVO1_BOUNDING_BOX,
-            )
-        )
-        next_body.collisions.append(
-            Collision(
-                f"{name_prefix}_activehingemotor_collision2",
-                SERVO_BBOX2_POSITION,
-                Quaternion(),
-                SERVO2_MASS,
-                SERVO2_BOUNDING_BOX,
-            )
-        )
-        next_body.visuals.append(
-            Visual(
-                f"{name_prefix}_activehingemotor_visual",
-                Vector3(),
-                Quaternion(),
-                "model://rg_robot/meshes/ActiveCardanHinge_Servo_Holder.dae",
-                (0.0, 1.0, 0.0),
-            )
-        )
 
-        child = module.children[ActiveHinge.ATTACHMENT]
-        if child is not None:
-            rotation = Quaternion.from_eulers([child.rotation, 0.0, 0.0])
+class _CanonicalFormMaker:
+    """
+    Describes a body as a string, in which equivalent module descriptions are made the same.
 
-            self._make_module(
-                child,
-                next_body,
-                f"{name_prefix}_attachment",
-                rotation * Vector3([ATTACHMENT_OFFSET, 0.0, 0.0]),
-                rotation,
-            )
+    Rotations are described in quarter turns, modulo a full turn.
+    Children are described in the order of their slots, which is the order in which ids are assigned,
+    so equal descriptions also have the same order of active hinges.
+    """
+
+    def make(self, body: Body) -> str:
+        return self._make_recur(body.core)
+
+    def _make_recur(self, module: Optional[Module]) -> str:
+        if module is None:
+            return "-"
+
+        children = ",".join(self._make_recur(child) for child in module.children)
+        if isinstance(module, Core):
+            # the core is always placed the same, regardless of its rotation
+            return f"C[{children}]"
+
+        quarter_turns = self._format_quarter_turns(
+            round(module.rotation / (math.pi / 2.0), 9) % 4.0
+        )
+        if isinstance(module, Brick):
+            return f"B{quarter_turns}[{children}]"
+        elif isinstance(module, ActiveHinge):
+            return f"H{quarter_turns}[{children}]"
+        else:
+            raise NotImplementedError("Module type not implemented")
+
+    @staticmethod
+    def _format_quarter_turns(quarter_turns: float) -> str:
+        if quarter_turns.is_integer():
+            return str(int(quarter_turns))
+        return repr(quarter_turns)
 
 
 class _ActiveHingeFinder:
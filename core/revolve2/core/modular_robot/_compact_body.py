@@ -0,0 +1,923 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from pyrr import Quaternion, Vector3
+
+from revolve2.core.physics.actor import Actor, Collision, Joint, RigidBody, Visual
+
+from ._active_hinge import ActiveHinge
+from ._brick import Brick
+from ._core import Core
+
+
+class CompactBody:
+    """
+    A body stored as arrays with an entry for every module, instead of as a tree of module objects.
+    Uses far less memory and is faster to traverse than the tree,
+    so it is suited for holding many bodies, such as those of a whole population.
+
+    Modules are stored in the order in which finalizing the body assigns ids,
+    so the index of a module is its id. The core is module 0.
+    Convert from and to a tree using `Body.to_compact` and `Body.from_compact`.
+    """
+
+    # module types
+    CORE = 0
+    BRICK = 1
+    ACTIVE_HINGE = 2
+
+    # number of children of every module type
+    NUM_SLOTS = [4, 3, 1]
+
+    types: npt.NDArray[np.uint8]  # type of every module
+    parents: npt.NDArray[
+        np.int32
+    ]  # index of the parent of every module. -1 for the core.
+    parent_slots: npt.NDArray[
+        np.int8
+    ]  # child index in its parent of every module. -1 for the core.
+    rotations: npt.NDArray[np.float_]  # rotation of every module
+    children: npt.NDArray[
+        np.int32
+    ]  # (modules, 4) index of the child of every module in every slot, or -1. derived from the parents.
+
+    def __init__(
+        self,
+        types: npt.ArrayLike,
+        parents: npt.ArrayLike,
+        parent_slots: npt.ArrayLike,
+        rotations: npt.ArrayLike,
+    ) -> None:
+        """
+        :param types: Type of every module.
+        :param parents: Index of the parent of every module. -1 for the core.
+        :param parent_slots: Child index in its parent of every module. -1 for the core.
+        :param rotations: Rotation of every module.
+        """
+        self.types = np.asarray(types, dtype=np.uint8)
+        self.parents = np.asarray(parents, dtype=np.int32)
+        self.parent_slots = np.asarray(parent_slots, dtype=np.int8)
+        self.rotations = np.asarray(rotations, dtype=np.float64)
+
+        num_modules = len(self.types)
+        assert num_modules > 0
+        assert self.types.shape == (num_modules,)
+        assert self.parents.shape == (num_modules,)
+        assert self.parent_slots.shape == (num_modules,)
+        assert self.rotations.shape == (num_modules,)
+        assert self.types[0] == self.CORE
+        assert self.parents[0] == -1 and self.parent_slots[0] == -1
+        assert np.all(self.types[1:] != self.CORE)
+        assert np.all(self.types <= self.ACTIVE_HINGE)
+
+        # parents must come before their children
+        child_indices = np.arange(1, num_modules)
+        child_parents = self.parents[1:]
+        child_slots = self.parent_slots[1:]
+        assert np.all((child_parents >= 0) & (child_parents < child_indices))
+        assert np.all(
+            (child_slots >= 0)
+            & (child_slots < np.array(self.NUM_SLOTS)[self.types[child_parents]])
+        )
+
+        self.children = np.full((num_modules, 4), -1, dtype=np.int32)
+        self.children[child_parents, child_slots] = child_indices
+        # no slot can be used twice and modules must be in order of id
+        assert np.count_nonzero(self.children != -1) == num_modules - 1
+        assert self._preorder() == list(range(num_modules))
+
+    def _preorder(self) -> List[int]:
+        """
+        :returns: Indices of all modules in the order finalizing assigns ids.
+        """
+        children = self.children.tolist()
+        order: List[int] = []
+        open_modules = [0]
+        while len(open_modules) > 0:
+            module = open_modules.pop()
+            order.append(module)
+            open_modules += [
+                child for child in reversed(children[module]) if child != -1
+            ]
+        return order
+
+    @property
+    def num_modules(self) -> int:
+        return len(self.types)
+
+    def find_active_hinges(self) -> npt.NDArray[np.int64]:
+        """
+        Find all active hinges in the body.
+
+        :returns: Ids of the active hinges, in the same order as `Body.find_active_hinges`.
+        """
+        return np.flatnonzero(self.types == self.ACTIVE_HINGE)
+
+    def to_actor(self) -> Tuple[Actor, List[int]]:
+        """
+        Create an actor from this body.
+        Uses exact precomputed transforms when all module rotations are multiples of 90 degrees.
+
+        :returns: (the actor, ids of modules matching the joints in the actor)
+        """
+        actor = _LatticeActorBuilder().build(self)
+        if actor is None:
+            actor = _ActorBuilder().build(self)
+        return actor
+
+
+# geometry of the modules
+_CORE_BOUNDING_BOX = (0.089, 0.089, 0.0603)  # meter
+_CORE_MASS = 0.250  # kg
+_CORE_CHILD_OFFSET = 0.089 / 2.0  # meter
+
+_BRICK_BOUNDING_BOX = (0.06288625, 0.06288625, 0.0603)  # meter
+_BRICK_MASS = 0.030  # kg
+_BRICK_CHILD_OFFSET = 0.06288625 / 2.0  # meter
+
+_ACTIVE_HINGE_FRAME_BOUNDING_BOX = (0.04525, 0.053, 0.0165891)  # meter
+_ACTIVE_HINGE_SERVO1_BOUNDING_BOX = (0.0583, 0.0512, 0.020)  # meter
+_ACTIVE_HINGE_SERVO2_BOUNDING_BOX = (0.002, 0.053, 0.053)  # meter
+_ACTIVE_HINGE_FRAME_MASS = 0.011  # kg
+_ACTIVE_HINGE_SERVO1_MASS = 0.058  # kg
+_ACTIVE_HINGE_SERVO2_MASS = (
+    0.0  # kg. we simplify by only using the weight of the first box
+)
+_ACTIVE_HINGE_SERVO_OFFSET = 0.0299  # meter. distance from frame to servo
+_ACTIVE_HINGE_JOINT_OFFSET = 0.0119  # meter. distance from frame to joint
+_ACTIVE_HINGE_SERVO_BBOX2_POSITION = (
+    _ACTIVE_HINGE_SERVO1_BOUNDING_BOX[0] / 2.0
+    + _ACTIVE_HINGE_SERVO2_BOUNDING_BOX[0] / 2.0,
+    0.0,
+    0.0,
+)
+_ACTIVE_HINGE_ATTACHMENT_OFFSET = (
+    _ACTIVE_HINGE_SERVO1_BOUNDING_BOX[0] / 2.0 + _ACTIVE_HINGE_SERVO2_BOUNDING_BOX[0]
+)
+
+
+class _ActorBuilder:
+    """
+    Builds actors for bodies with arbitrary module rotations.
+    """
+
+    _STATIC_FRICTION = 1.0
+    _DYNAMIC_FRICTION = 1.0
+
+    robot: Actor
+    dof_ids: List[int]
+
+    _types: List[int]
+    _children: List[List[int]]
+    _rotations: List[float]
+
+    def build(self, body: CompactBody) -> Tuple[Actor, List[int]]:
+        self.robot = Actor([], [])
+        self.dof_ids = []
+
+        self._types = body.types.tolist()
+        self._children = body.children.tolist()
+        self._rotations = body.rotations.tolist()
+
+        origin_body = RigidBody(
+            "origin",
+            Vector3(),
+            Quaternion(),
+            self._STATIC_FRICTION,
+            self._DYNAMIC_FRICTION,
+        )
+        self.robot.bodies.append(origin_body)
+
+        self._make_module(0, origin_body, "origin", Vector3(), Quaternion())
+
+        return (self.robot, self.dof_ids)
+
+    def _make_module(
+        self,
+        module: int,
+        body: RigidBody,
+        name_prefix: str,
+        attachment_offset: Vector3,
+        orientation: Quaternion,
+    ) -> None:
+        module_type = self._types[module]
+        if module_type == CompactBody.CORE:
+            self._make_core(
+                module,
+                body,
+                name_prefix,
+                attachment_offset,
+                orientation,
+            )
+        elif module_type == CompactBody.BRICK:
+            self._make_brick(
+                module,
+                body,
+                name_prefix,
+                attachment_offset,
+                orientation,
+            )
+        elif module_type == CompactBody.ACTIVE_HINGE:
+            self._make_active_hinge(
+                module,
+                body,
+                name_prefix,
+                attachment_offset,
+                orientation,
+            )
+        else:
+            raise NotImplementedError("Module type not implemented")
+
+    def _make_core(
+        self,
+        module: int,
+        body: RigidBody,
+        name_prefix: str,
+        attachment_point: Vector3,
+        orientation: Quaternion,
+    ) -> None:
+        BOUNDING_BOX = Vector3(_CORE_BOUNDING_BOX)
+        MASS = _CORE_MASS
+        CHILD_OFFSET = _CORE_CHILD_OFFSET
+
+        # attachment position is always at center of core
+        position = attachment_point
+
+        body.collisions.append(
+            Collision(
+                f"{name_prefix}_core_collision",
+                position,
+                orientation,
+                MASS,
+                BOUNDING_BOX,
+            )
+        )
+        body.visuals.append(
+            Visual(
+                f"{name_prefix}_core_visual",
+                position,
+                orientation,
+                "model://rg_robot/meshes/CoreComponent.dae",
+                (1.0, 1.0, 0.0),
+            )
+        )
+
+        for name_suffix, child_index, angle in [
+            ("front", Core.FRONT, 0.0),
+            ("back", Core.BACK, math.pi),
+            ("left", Core.LEFT, math.pi / 2.0),
+            ("right", Core.RIGHT, math.pi / 2.0 * 3),
+        ]:
+            child = self._children[module][child_index]
+            if child != -1:
+                rotation = (
+                    orientation
+                    * Quaternion.from_eulers([0.0, 0.0, angle])
+                    * Quaternion.from_eulers([self._rotations[child], 0, 0])
+                )
+
+                self._make_module(
+                    child,
+                    body,
+                    f"{name_prefix}_{name_suffix}",
+                    position + rotation * Vector3([CHILD_OFFSET, 0.0, 0.0]),
+                    rotation,
+                )
+
+    def _make_brick(
+        self,
+        module: int,
+        body: RigidBody,
+        name_prefix: str,
+        attachment_point: Vector3,
+        orientation: Quaternion,
+    ) -> None:
+        BOUNDING_BOX = Vector3(_BRICK_BOUNDING_BOX)
+        MASS = _BRICK_MASS
+        CHILD_OFFSET = _BRICK_CHILD_OFFSET
+
+        position = attachment_point + orientation * Vector3(
+            [BOUNDING_BOX[0] / 2.0, 0.0, 0.0]
+        )
+
+        body.collisions.append(
+            Collision(
+                f"{name_prefix}_brick_collision",
+                position,
+                orientation,
+                MASS,
+                BOUNDING_BOX,
+            )
+        )
+        body.visuals.append(
+            Visual(
+                f"{name_prefix}_brick_visual",
+                position,
+                orientation,
+                "model://rg_robot/meshes/FixedBrick.dae",
+                (1.0, 0.0, 0.0),
+            )
+        )
+
+        for name_suffix, child_index, angle in [
+            ("front", Brick.FRONT, 0.0),
+            ("left", Brick.LEFT, math.pi / 2.0),
+            ("right", Brick.RIGHT, math.pi / 2.0 * 3),
+        ]:
+            child = self._children[module][child_index]
+            if child != -1:
+                rotation = (
+                    orientation
+                    * Quaternion.from_eulers([0.0, 0.0, angle])
+                    * Quaternion.from_eulers([self._rotations[child], 0, 0])
+                )
+
+                self._make_module(
+                    child,
+                    body,
+                    f"{name_prefix}_{name_suffix}",
+                    position + rotation * Vector3([CHILD_OFFSET, 0.0, 0.0]),
+                    rotation,
+                )
+
+    def _make_active_hinge(
+        self,
+        module: int,
+        body: RigidBody,
+        name_prefix: str,
+        attachment_point: Vector3,
+        orientation: Quaternion,
+    ) -> None:
+        FRAME_BOUNDING_BOX = Vector3(_ACTIVE_HINGE_FRAME_BOUNDING_BOX)
+        SERVO1_BOUNDING_BOX = Vector3(_ACTIVE_HINGE_SERVO1_BOUNDING_BOX)
+        SERVO2_BOUNDING_BOX = Vector3(_ACTIVE_HINGE_SERVO2_BOUNDING_BOX)
+
+        FRAME_MASS = _ACTIVE_HINGE_FRAME_MASS
+        SERVO1_MASS = _ACTIVE_HINGE_SERVO1_MASS
+        SERVO2_MASS = _ACTIVE_HINGE_SERVO2_MASS
+
+        SERVO_OFFSET = _ACTIVE_HINGE_SERVO_OFFSET
+        JOINT_OFFSET = _ACTIVE_HINGE_JOINT_OFFSET
+
+        SERVO_BBOX2_POSITION = Vector3(_ACTIVE_HINGE_SERVO_BBOX2_POSITION)
+
+        ATTACHMENT_OFFSET = _ACTIVE_HINGE_ATTACHMENT_OFFSET
+
+        frame_position = attachment_point + orientation * Vector3(
+            [FRAME_BOUNDING_BOX[0] / 2.0, 0.0, 0.0]
+        )
+        servo_body_position = body.position + body.orientation * (
+            frame_position + orientation * Vector3([SERVO_OFFSET, 0.0, 0.0])
+        )
+        servo_body_orientation = body.orientation * orientation
+        joint_position = body.position + body.orientation * (
+            frame_position + orientation * Vector3([JOINT_OFFSET, 0.0, 0.0])
+        )
+        joint_orientation = body.orientation * orientation
+
+        body.collisions.append(
+            Collision(
+                f"{name_prefix}_activehingeframe_collision",
+                frame_position,
+                orientation,
+                FRAME_MASS,
+                FRAME_BOUNDING_BOX,
+            )
+        )
+        body.visuals.append(
+            Visual(
+                f"{name_prefix}_activehingeframe_visual",
+                frame_position,
+                orientation,
+                "model://rg_robot/meshes/ActiveHinge_Frame.dae",
+                (0.0, 1.0, 0.0),
+            )
+        )
+
+        next_body = RigidBody(
+            f"{name_prefix}_activehinge",
+            servo_body_position,
+            servo_body_orientation,
+            self._STATIC_FRICTION,
+            self._DYNAMIC_FRICTION,
+        )
+        self.robot.bodies.append(next_body)
+        self.robot.joints.append(
+            Joint(
+                f"{name_prefix}_activehinge",
+                body,
+                next_body,
+                joint_position,
+                joint_orientation,
+                Vector3([0.0, 1.0, 0.0]),
+                range=ActiveHinge.RANGE,
+                effort=ActiveHinge.EFFORT,
+                velocity=ActiveHinge.VELOCITY,
+            )
+        )
+        self.dof_ids.append(module)
+
+        next_body.collisions.append(
+            Collision(
+                f"{name_prefix}_activehingemotor_collision1",
+                Vector3(),
+                Quaternion(),
+                SERVO1_MASS,
+                SERVO1_BOUNDING_BOX,
+            )
+        )
+        next_body.collisions.append(
+            Collision(
+                f"{name_prefix}_activehingemotor_collision2",
+                SERVO_BBOX2_POSITION,
+                Quaternion(),
+                SERVO2_MASS,
+                SERVO2_BOUNDING_BOX,
+            )
+        )
+        next_body.visuals.append(
+            Visual(
+                f"{name_prefix}_activehingemotor_visual",
+                Vector3(),
+                Quaternion(),
+                "model://rg_robot/meshes/ActiveCardanHinge_Servo_Holder.dae",
+                (0.0, 1.0, 0.0),
+            )
+        )
+
+        child = self._children[module][ActiveHinge.ATTACHMENT]
+        if child != -1:
+            rotation = Quaternion.from_eulers([self._rotations[child], 0.0, 0.0])
+
+            self._make_module(
+                child,
+                next_body,
+                f"{name_prefix}_attachment",
+                rotation * Vector3([ATTACHMENT_OFFSET, 0.0, 0.0]),
+                rotation,
+            )
+
+
+class _Lattice:
+    """
+    The rotations that map the axes onto the axes, which are all compositions of 90 degree rotations.
+
+    Every rotation is included with both signs of its quaternion,
+    so composing them results in the same quaternions as composing them using pyrr, without rounding errors.
+    Rotating a vector by one of them only permutes and negates its components, which is exact.
+    """
+
+    # values that components of the quaternions can have
+    _COMPONENTS = np.array([-1.0, -math.sqrt(0.5), -0.5, 0.0, 0.5, math.sqrt(0.5), 1.0])
+
+    _instance: Optional[_Lattice] = None
+
+    quaternions: npt.NDArray[np.float_]  # (48, 4) xyzw
+    products: List[List[int]]  # index of the product of every pair of rotations
+    permutations: npt.NDArray[np.int64]  # (48, 3) source component of every component
+    signs: npt.NDArray[np.float_]  # (48, 3) sign of every component
+    identity: int
+    _indices: Dict[Tuple[int, ...], int]  # index of every rotation by its components
+
+    @classmethod
+    def get(cls) -> _Lattice:
+        """
+        :returns: The lattice, which is created when first required.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self) -> None:
+        keys = [self._key(Quaternion())]
+        self._indices = {keys[0]: 0}
+        generators = [
+            Quaternion.from_eulers([math.pi / 2.0, 0.0, 0.0]),
+            Quaternion.from_eulers([0.0, 0.0, math.pi / 2.0]),
+        ]
+        for key in keys:  # grows while iterating until the group is closed
+            for generator in generators:
+                product = self._key(Quaternion(self._COMPONENTS[list(key)]) * generator)
+                if product not in self._indices:
+                    self._indices[product] = len(keys)
+                    keys.append(product)
+        assert len(keys) == 48
+
+        self.quaternions = self._COMPONENTS[np.array(keys)]
+        self.identity = 0
+        self.products = [
+            [
+                self._indices[self._key(Quaternion(q1) * Quaternion(q2))]
+                for q2 in self.quaternions
+            ]
+            for q1 in self.quaternions
+        ]
+
+        matrices = np.rint(
+            [
+                [list(Quaternion(q) * Vector3(axis)) for axis in np.identity(3)]
+                for q in self.quaternions
+            ]
+        ).transpose(0, 2, 1)
+        self.permutations = np.argmax(np.abs(matrices), axis=2)
+        self.signs = np.take_along_axis(
+            matrices, self.permutations[:, :, np.newaxis], axis=2
+        )[:, :, 0]
+
+    def _key(self, quaternion: Quaternion) -> Tuple[int, ...]:
+        nearest = np.argmin(
+            np.abs(np.asarray(quaternion)[:, np.newaxis] - self._COMPONENTS), axis=1
+        )
+        return tuple(nearest.tolist())
+
+    def index(self, quaternion: Quaternion) -> Optional[int]:
+        """
+        :returns: Index of the rotation, or None if the quaternion is not close to one of the rotations.
+        """
+        key = self._key(quaternion)
+        if not np.allclose(
+            self._COMPONENTS[list(key)], quaternion, rtol=0.0, atol=1e-12
+        ):
+            return None
+        return self._indices.get(key)
+
+    def rotate_all(self, vector: Tuple[float, float, float]) -> npt.NDArray[np.float_]:
+        """
+        :returns: (48, 3) the vector rotated by every rotation.
+        """
+        return self.signs * np.array(vector)[self.permutations]
+
+
+class _LatticeActorBuilder:
+    """
+    Builds actors for bodies of which all module rotations are multiples of 90 degrees.
+
+    All orientations are then rotations of the lattice, which are represented by their index.
+    The transforms of collisions, visuals and children relative to every module
+    are precomputed for every orientation the module can have.
+    The resulting actor is the same as that of `_ActorBuilder`, minus the rounding errors of the rotations.
+    """
+
+    _STATIC_FRICTION = _ActorBuilder._STATIC_FRICTION
+    _DYNAMIC_FRICTION = _ActorBuilder._DYNAMIC_FRICTION
+
+    # the transforms per orientation. created when first required.
+    _templates: Optional[Dict[str, npt.NDArray[np.float_]]] = None
+
+    robot: Actor
+    dof_ids: List[int]
+
+    _lattice: _Lattice
+    _types: List[int]
+    _children: List[List[int]]
+    _rolls: Dict[int, int]  # rotation of every module but the core around its x axis
+    _core_slots: List[Tuple[str, int, int]]  # (name, child index, z rotation)
+    _brick_slots: List[Tuple[str, int, int]]  # (name, child index, z rotation)
+
+    def build(self, body: CompactBody) -> Optional[Tuple[Actor, List[int]]]:
+        """
+        :returns: The actor and dof ids like `_ActorBuilder.build`,
+                  or None if not all module rotations are multiples of 90 degrees.
+        """
+        self._lattice = _Lattice.get()
+
+        # the rotation of the core is not used
+        rolls: Dict[float, int] = {}
+        for rotation in set(body.rotations[1:].tolist()):
+            roll = self._lattice.index(Quaternion.from_eulers([rotation, 0.0, 0.0]))
+            if roll is None:
+                return None
+            rolls[rotation] = roll
+        self._rolls = {
+            module: rolls[rotation]
+            for module, rotation in enumerate(body.rotations.tolist())
+            if module != 0
+        }
+
+        self._types = body.types.tolist()
+        self._children = body.children.tolist()
+        self._core_slots = self._make_slots(
+            [
+                ("front", Core.FRONT, 0.0),
+                ("back", Core.BACK, math.pi),
+                ("left", Core.LEFT, math.pi / 2.0),
+                ("right", Core.RIGHT, math.pi / 2.0 * 3),
+            ]
+        )
+        self._brick_slots = self._make_slots(
+            [
+                ("front", Brick.FRONT, 0.0),
+                ("left", Brick.LEFT, math.pi / 2.0),
+                ("right", Brick.RIGHT, math.pi / 2.0 * 3),
+            ]
+        )
+        templates = self._get_templates()
+
+        self.robot = Actor([], [])
+        self.dof_ids = []
+
+        origin_body = RigidBody(
+            "origin",
+            Vector3(),
+            Quaternion(),
+            self._STATIC_FRICTION,
+            self._DYNAMIC_FRICTION,
+        )
+        self.robot.bodies.append(origin_body)
+
+        self._make_module(
+            0,
+            origin_body,
+            self._lattice.identity,
+            "origin",
+            np.zeros(3),
+            self._lattice.identity,
+            templates,
+        )
+
+        return (self.robot, self.dof_ids)
+
+    def _make_slots(
+        self, slots: List[Tuple[str, int, float]]
+    ) -> List[Tuple[str, int, int]]:
+        turns = []
+        for name_suffix, child_index, angle in slots:
+            turn = self._lattice.index(Quaternion.from_eulers([0.0, 0.0, angle]))
+            assert turn is not None
+            turns.append((name_suffix, child_index, turn))
+        return turns
+
+    @classmethod
+    def _get_templates(cls) -> Dict[str, npt.NDArray[np.float_]]:
+        if cls._templates is None:
+            lattice = _Lattice.get()
+            cls._templates = {
+                "core_child": lattice.rotate_all((_CORE_CHILD_OFFSET, 0.0, 0.0)),
+                "brick_center": lattice.rotate_all(
+                    (_BRICK_BOUNDING_BOX[0] / 2.0, 0.0, 0.0)
+                ),
+                "brick_child": lattice.rotate_all((_BRICK_CHILD_OFFSET, 0.0, 0.0)),
+                "active_hinge_frame": lattice.rotate_all(
+                    (_ACTIVE_HINGE_FRAME_BOUNDING_BOX[0] / 2.0, 0.0, 0.0)
+                ),
+                "active_hinge_servo": lattice.rotate_all(
+                    (_ACTIVE_HINGE_SERVO_OFFSET, 0.0, 0.0)
+                ),
+                "active_hinge_joint": lattice.rotate_all(
+                    (_ACTIVE_HINGE_JOINT_OFFSET, 0.0, 0.0)
+                ),
+                "active_hinge_child": lattice.rotate_all(
+                    (_ACTIVE_HINGE_ATTACHMENT_OFFSET, 0.0, 0.0)
+                ),
+            }
+        return cls._templates
+
+    def _make_module(
+        self,
+        module: int,
+        body: RigidBody,
+        body_orientation: int,
+        name_prefix: str,
+        attachment_point: npt.NDArray[np.float_],
+        orientation: int,
+        templates: Dict[str, npt.NDArray[np.float_]],
+    ) -> None:
+        """
+        :param body_orientation: Orientation of the rigid body in the actor.
+        :param attachment_point: Relative to the rigid body.
+        :param orientation: Relative to the rigid body.
+        """
+        module_type = self._types[module]
+        if module_type == CompactBody.CORE:
+            position = attachment_point
+            self._add_collision_and_visual(
+                body,
+                f"{name_prefix}_core",
+                position,
+                orientation,
+                _CORE_MASS,
+                _CORE_BOUNDING_BOX,
+                "model://rg_robot/meshes/CoreComponent.dae",
+                (1.0, 1.0, 0.0),
+            )
+            self._make_children(
+                module,
+                body,
+                body_orientation,
+                name_prefix,
+                position,
+                orientation,
+                self._core_slots,
+                templates["core_child"],
+                templates,
+            )
+        elif module_type == CompactBody.BRICK:
+            position = attachment_point + templates["brick_center"][orientation]
+            self._add_collision_and_visual(
+                body,
+                f"{name_prefix}_brick",
+                position,
+                orientation,
+                _BRICK_MASS,
+                _BRICK_BOUNDING_BOX,
+                "model://rg_robot/meshes/FixedBrick.dae",
+                (1.0, 0.0, 0.0),
+            )
+            self._make_children(
+                module,
+                body,
+                body_orientation,
+                name_prefix,
+                position,
+                orientation,
+                self._brick_slots,
+                templates["brick_child"],
+                templates,
+            )
+        elif module_type == CompactBody.ACTIVE_HINGE:
+            self._make_active_hinge(
+                module,
+                body,
+                body_orientation,
+                name_prefix,
+                attachment_point,
+                orientation,
+                templates,
+            )
+        else:
+            raise NotImplementedError("Module type not implemented")
+
+    def _make_children(
+        self,
+        module: int,
+        body: RigidBody,
+        body_orientation: int,
+        name_prefix: str,
+        position: npt.NDArray[np.float_],
+        orientation: int,
+        slots: List[Tuple[str, int, int]],
+        child_offsets: npt.NDArray[np.float_],
+        templates: Dict[str, npt.NDArray[np.float_]],
+    ) -> None:
+        for name_suffix, child_index, turn in slots:
+            child = self._children[module][child_index]
+            if child != -1:
+                rotation = self._lattice.products[
+                    self._lattice.products[orientation][turn]
+                ][self._rolls[child]]
+
+                self._make_module(
+                    child,
+                    body,
+                    body_orientation,
+                    f"{name_prefix}_{name_suffix}",
+                    position + child_offsets[rotation],
+                    rotation,
+                    templates,
+                )
+
+    def _make_active_hinge(
+        self,
+        module: int,
+        body: RigidBody,
+        body_orientation: int,
+        name_prefix: str,
+        attachment_point: npt.NDArray[np.float_],
+        orientation: int,
+        templates: Dict[str, npt.NDArray[np.float_]],
+    ) -> None:
+        frame_position = attachment_point + templates["active_hinge_frame"][orientation]
+        servo_body_position = body.position + self._rotate(
+            body_orientation,
+            frame_position + templates["active_hinge_servo"][orientation],
+        )
+        servo_body_orientation = self._lattice.products[body_orientation][orientation]
+        joint_position = body.position + self._rotate(
+            body_orientation,
+            frame_position + templates["active_hinge_joint"][orientation],
+        )
+
+        self._add_collision_and_visual(
+            body,
+            f"{name_prefix}_activehingeframe",
+            frame_position,
+            orientation,
+            _ACTIVE_HINGE_FRAME_MASS,
+            _ACTIVE_HINGE_FRAME_BOUNDING_BOX,
+            "model://rg_robot/meshes/ActiveHinge_Frame.dae",
+            (0.0, 1.0, 0.0),
+        )
+
+        next_body = RigidBody(
+            f"{name_prefix}_activehinge",
+            Vector3(servo_body_position),
+            self._quaternion(servo_body_orientation),
+            self._STATIC_FRICTION,
+            self._DYNAMIC_FRICTION,
+        )
+        self.robot.bodies.append(next_body)
+        self.robot.joints.append(
+            Joint(
+                f"{name_prefix}_activehinge",
+                body,
+                next_body,
+                Vector3(joint_position),
+                self._quaternion(servo_body_orientation),
+                Vector3([0.0, 1.0, 0.0]),
+                range=ActiveHinge.RANGE,
+                effort=ActiveHinge.EFFORT,
+                velocity=ActiveHinge.VELOCITY,
+            )
+        )
+        self.dof_ids.append(module)
+
+        next_body.collisions.append(
+            Collision(
+                f"{name_prefix}_activehingemotor_collision1",
+                Vector3(),
+                Quaternion(),
+                _ACTIVE_HINGE_SERVO1_MASS,
+                Vector3(_ACTIVE_HINGE_SERVO1_BOUNDING_BOX),
+            )
+        )
+        next_body.collisions.append(
+            Collision(
+                f"{name_prefix}_activehingemotor_collision2",
+                Vector3(_ACTIVE_HINGE_SERVO_BBOX2_POSITION),
+                Quaternion(),
+                _ACTIVE_HINGE_SERVO2_MASS,
+                Vector3(_ACTIVE_HINGE_SERVO2_BOUNDING_BOX),
+            )
+        )
+        next_body.visuals.append(
+            Visual(
+                f"{name_prefix}_activehingemotor_visual",
+                Vector3(),
+                Quaternion(),
+                "model://rg_robot/meshes/ActiveCardanHinge_Servo_Holder.dae",
+                (0.0, 1.0, 0.0),
+            )
+        )
+
+        child = self._children[module][ActiveHinge.ATTACHMENT]
+        if child != -1:
+            rotation = self._rolls[child]
+
+            self._make_module(
+                child,
+                next_body,
+                servo_body_orientation,
+                f"{name_prefix}_attachment",
+                templates["active_hinge_child"][rotation],
+                rotation,
+                templates,
+            )
+
+    def _add_collision_and_visual(
+        self,
+        body: RigidBody,
+        name: str,
+        position: npt.NDArray[np.float_],
+        orientation: int,
+        mass: float,
+        bounding_box: Tuple[float, float, float],
+        model: str,
+        color: Tuple[float, float, float],
+    ) -> None:
+        # position and orientation are shared by the collision and visual, like `_ActorBuilder` does
+        position_vector = Vector3(position)
+        orientation_quaternion = self._quaternion(orientation)
+        body.collisions.append(
+            Collision(
+                f"{name}_collision",
+                position_vector,
+                orientation_quaternion,
+                mass,
+                Vector3(bounding_box),
+            )
+        )
+        body.visuals.append(
+            Visual(
+                f"{name}_visual",
+                position_vector,
+                orientation_quaternion,
+                model,
+                color,
+            )
+        )
+
+    def _rotate(
+        self, orientation: int, vector: npt.NDArray[np.float_]
+    ) -> npt.NDArray[np.float_]:
+        rotated: npt.NDArray[np.float_] = (
+            self._lattice.signs[orientation]
+            * vector[self._lattice.permutations[orientation]]
+        )
+        return rotated
+
+    def _quaternion(self, orientation: int) -> Quaternion:
+        return Quaternion(self._lattice.quaternions[orientation].copy())
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+from typing import List, Optional
 
+import numpy as np
+
+from ._module_graph import ModuleGraph
 from ._not_finalized_error import NotFinalizedError
 
 
@@ -13,6 +16,7 @@ class Module:
     _id: Optional[int]
     _parent: Optional[Module]
     _parent_child_index: Optional[int]
+    _graph: Optional[ModuleGraph]  # adjacency of all modules in the body
 
     def __init__(self, num_children: int, rotation: float):
         self._children = [None] * num_children
@@ -21,6 +25,7 @@ class Module:
         self._id = None
         self._parent = None
         self._parent_child_index = None
+        self._graph = None
 
     @property
     def children(self) -> List[Optional[Module]]:
@@ -43,26 +48,14 @@ class Module:
         self._id = id
 
     def neighbours(self, within_range: int) -> List[Module]:
-        if self._id is None:
-            raise NotFinalizedError()
+        """
+        Find all modules within a number of jumps from this module in the body's tree structure.
 
-        out_neighbours: List[Module] = []
-
-        open_nodes: List[Tuple[Module, Optional[Module]]] = [
-            (self, None)
-        ]  # (module, came_from)
-
-        for _ in range(within_range):
-            new_open_nodes: List[Tuple[Module, Optional[Module]]] = []
-            for (open_node, came_from) in open_nodes:
-                neighbours = [
-                    mod
-                    for mod in open_node.children + [open_node._parent]
-                    if mod is not None
-                    and (came_from is None or mod.id is not came_from.id)
-                ]
-                out_neighbours += neighbours
-                new_open_nodes += list(zip(neighbours, [open_node] * len(neighbours)))
-            open_nodes = new_open_nodes
+        :param within_range: Maximum number of jumps.
+        :returns: The modules, ordered by number of jumps.
+        """
+        if self._graph is None:
+            raise NotFinalizedError()
 
-        return out_neighbours
+        _, ids = self._graph.neighbours(np.array([self.id]), within_range)
+        return [self._graph.modules[id] for id in ids]
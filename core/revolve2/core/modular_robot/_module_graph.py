@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from ._module import Module
+
+
+class ModuleGraph:
+    """
+    Adjacency of all modules in a finalized body, in compressed sparse row format over module ids.
+    Shared by all modules of the body.
+
+    The neighbours of every module are its children in order of child index, followed by its parent.
+    """
+
+    modules: List[Module]  # all modules, by id
+    indptr: npt.NDArray[
+        np.int64
+    ]  # index in `indices` of the first neighbour of every module, followed by the number of neighbours
+    indices: npt.NDArray[np.int64]  # ids of the neighbours of every module
+
+    def __init__(self, modules: List[Module]) -> None:
+        """
+        :param modules: All modules of the body, by id. Their parents must be set.
+        """
+        self.modules = modules
+
+        adjacency = [
+            [child.id for child in module.children if child is not None]
+            + ([] if module._parent is None else [module._parent.id])
+            for module in modules
+        ]
+        self.indptr = np.zeros(len(modules) + 1, dtype=np.int64)
+        np.cumsum([len(neighbours) for neighbours in adjacency], out=self.indptr[1:])
+        self.indices = np.array(
+            [id for neighbours in adjacency for id in neighbours], dtype=np.int64
+        )
+
+    def neighbours(
+        self, ids: npt.NDArray[np.int64], within_range: int
+    ) -> Tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        """
+        Find the modules within a number of jumps of each of the given modules, for all of them at once.
+
+        :param ids: Ids of the modules to find the neighbours of.
+        :param within_range: Maximum number of jumps.
+        :returns: (index in `ids` of the module the neighbour belongs to, id of the neighbour),
+                  grouped by module in the order of `ids`.
+                  The neighbours of a single module are ordered the same as `Module.neighbours`.
+        """
+        origins = np.arange(len(ids))
+        nodes = np.asarray(ids, dtype=np.int64)
+        came_from = np.full(len(ids), -1)
+
+        found_origins: List[npt.NDArray[np.int64]] = []
+        found_nodes: List[npt.NDArray[np.int64]] = []
+        for _ in range(within_range):
+            # expand every open node to all its neighbours, except the one it was reached from
+            counts = self.indptr[nodes + 1] - self.indptr[nodes]
+            first_edges = self.indptr[nodes] - (np.cumsum(counts) - counts)
+            edges = np.repeat(first_edges, counts) + np.arange(np.sum(counts))
+            neighbours = self.indices[edges]
+            keep = neighbours != np.repeat(came_from, counts)
+
+            origins = np.repeat(origins, counts)[keep]
+            came_from = np.repeat(nodes, counts)[keep]
+            nodes = neighbours[keep]
+
+            found_origins.append(origins)
+            found_nodes.append(nodes)
+
+        all_origins = np.concatenate(found_origins + [np.zeros(0, dtype=np.int64)])
+        all_nodes = np.concatenate(found_nodes + [np.zeros(0, dtype=np.int64)])
+        order = np.argsort(all_origins, kind="stable")
+        return all_origins[order], all_nodes[order]
@@ -1,8 +1,16 @@
-from typing import List, Set
+from typing import Dict, List, Set, Tuple
+from weakref import WeakKeyDictionary
 
+import numpy as np
 from revolve2.actor_controllers.cpg import CpgNetworkStructure, CpgPair
 
-from revolve2.core.modular_robot import ActiveHinge
+from revolve2.core.modular_robot import ActiveHinge, NotFinalizedError
+from revolve2.core.modular_robot._module_graph import ModuleGraph
+
+# structures already made for every body, by the ids of the active hinges they were made for
+_cache: "WeakKeyDictionary[ModuleGraph, Dict[Tuple[int, ...], CpgNetworkStructure]]" = (
+    WeakKeyDictionary()
+)
 
 
 def make_cpg_network_structure_neighbour(
@@ -13,23 +21,53 @@ def make_cpg_network_structure_neighbour(
     The order of the active hinges matches the order of the cpgs.
     I.e. every active hinges has a corresponding cpg,
     and these are stored in the order the hinges are provided in.
+
+    The hinges must be part of the same finalized body.
+    The structure is cached per body, so the returned structure must not be modified.
     """
 
-    cpgs = CpgNetworkStructure.make_cpgs(len(active_hinges))
-    connections: Set[CpgPair] = set()
+    if len(active_hinges) == 0:
+        return CpgNetworkStructure([], set())
+
+    graph = active_hinges[0]._graph
+    if graph is None:
+        raise NotFinalizedError()
+    assert all(active_hinge._graph is graph for active_hinge in active_hinges)
+
+    key = tuple(active_hinge.id for active_hinge in active_hinges)
+    structures = _cache.setdefault(graph, {})
+    structure = structures.get(key)
+    if structure is None:
+        structure = _make(graph, key)
+        structures[key] = structure
+    return structure
 
-    active_hinge_to_cpg = {
-        active_hinge: cpg for active_hinge, cpg in zip(active_hinges, cpgs)
-    }
 
-    for active_hinge, cpg in zip(active_hinges, cpgs):
-        neighbours = [
-            n
-            for n in active_hinge.neighbours(within_range=2)
-            if isinstance(n, ActiveHinge)
-        ]
+def _make(graph: ModuleGraph, active_hinge_ids: Tuple[int, ...]) -> CpgNetworkStructure:
+    cpgs = CpgNetworkStructure.make_cpgs(len(active_hinge_ids))
+
+    # cpg of every module, or -1 for modules that are not one of the active hinges
+    module_cpgs = np.full(len(graph.modules), -1)
+    module_cpgs[list(active_hinge_ids)] = np.arange(len(active_hinge_ids))
+
+    # search the neighbourhoods of all hinges at once
+    origins, neighbours = graph.neighbours(np.array(active_hinge_ids), within_range=2)
+    is_active_hinge = np.array(
+        [isinstance(graph.modules[id], ActiveHinge) for id in neighbours.tolist()],
+        dtype=np.bool_,
+    )
+    origins = origins[is_active_hinge]
+    neighbour_cpgs = module_cpgs[neighbours[is_active_hinge]]
+    if np.any(neighbour_cpgs == -1):
+        raise KeyError("Neighbouring active hinge is not in the list of active hinges.")
+
+    # the connections are added hinge by hinge, like they used to be,
+    # because their iteration order determines which parameters belong to which connection.
+    connections: Set[CpgPair] = set()
+    bounds = np.searchsorted(origins, np.arange(len(cpgs) + 1)).tolist()
+    for cpg, neighbour_cpg_indices in zip(cpgs, np.split(neighbour_cpgs, bounds[1:-1])):
         connections = connections.union(
-            [CpgPair(cpg, active_hinge_to_cpg[neighbour]) for neighbour in neighbours]
+            [CpgPair(cpg, cpgs[index]) for index in neighbour_cpg_indices.tolist()]
         )
 
     return CpgNetworkStructure(cpgs, connections)
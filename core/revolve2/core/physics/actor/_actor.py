@@ -1,12 +1,19 @@
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List
 
-from pyrr import Quaternion, Vector3
+import numpy as np
+import numpy.typing as npt
+from pyrr import Vector3
 
 from ._bounding_box import BoundingBox
 from ._joint import Joint
 from ._rigid_body import RigidBody
 
+# signs of the coordinates of the 8 corners of a box centered at the origin
+_BOX_CORNER_SIGNS = np.array(
+    [[x, y, z] for z in [-1.0, 1.0] for y in [-1.0, 1.0] for x in [-1.0, 1.0]]
+)
+
 
 @dataclass
 class Actor:
@@ -19,126 +26,79 @@ class Actor:
         This not the exact bounding box for the actor,
         but the smallest box the actor fits in that is aligned
         with the global axes.
+        The box always contains the origin.
 
-        Not very efficient but it works and is fast enough for our use case
+        The corners of all collision boxes are transformed together.
         """
-        xmin = 0
-        xmax = 0
-        ymin = 0
-        ymax = 0
-        zmin = 0
-        zmax = 0
-
-        for body in self.bodies:
-            for collision in body.collisions:
-                box = _Box(
-                    (
-                        Vector3(
-                            [
-                                -collision.bounding_box.x,
-                                -collision.bounding_box.y,
-                                -collision.bounding_box.z,
-                            ]
-                        )
-                        / 2.0,
-                        Vector3(
-                            [
-                                collision.bounding_box.x,
-                                -collision.bounding_box.y,
-                                -collision.bounding_box.z,
-                            ]
-                        )
-                        / 2.0,
-                        Vector3(
-                            [
-                                -collision.bounding_box.x,
-                                collision.bounding_box.y,
-                                -collision.bounding_box.z,
-                            ]
-                        )
-                        / 2.0,
-                        Vector3(
-                            [
-                                collision.bounding_box.x,
-                                collision.bounding_box.y,
-                                -collision.bounding_box.z,
-                            ]
-                        )
-                        / 2.0,
-                        Vector3(
-                            [
-                                -collision.bounding_box.x,
-                                -collision.bounding_box.y,
-                                collision.bounding_box.z,
-                            ]
-                        )
-                        / 2.0,
-                        Vector3(
-                            [
-                                collision.bounding_box.x,
-                                -collision.bounding_box.y,
-                                collision.bounding_box.z,
-                            ]
-                        )
-                        / 2.0,
-                        Vector3(
-                            [
-                                -collision.bounding_box.x,
-                                collision.bounding_box.y,
-                                collision.bounding_box.z,
-                            ]
-                        )
-                        / 2.0,
-                        Vector3(
-                            [
-                                collision.bounding_box.x,
-                                collision.bounding_box.y,
-                                collision.bounding_box.z,
-                            ]
-                        )
-                        / 2.0,
-                    ),
-                )
-                box.rotate(collision.orientation)
-                box.translate(collision.position)
-                box.rotate(body.orientation)
-                box.translate(body.position)
-
-                aabb = box.aabb()
-                xmax = max(xmax, aabb.offset.x + aabb.size.x / 2.0)
-                ymax = max(ymax, aabb.offset.y + aabb.size.y / 2.0)
-                zmax = max(zmax, aabb.offset.z + aabb.size.z / 2.0)
-                xmin = min(xmin, aabb.offset.x - aabb.size.x / 2.0)
-                ymin = min(ymin, aabb.offset.y - aabb.size.y / 2.0)
-                zmin = min(zmin, aabb.offset.z - aabb.size.z / 2.0)
-
-        return BoundingBox(
-            Vector3([xmax - xmin, ymax - ymin, zmax - zmin]),
-            Vector3([(xmax + xmin) / 2.0, (ymax + ymin) / 2.0, (zmax + zmin) / 2.0]),
-        )
+        collisions = [
+            (body, collision) for body in self.bodies for collision in body.collisions
+        ]
 
+        # (collisions, 3) and (collisions, 4) arrays of all transforms
+        def gather(vectors: List[npt.ArrayLike], size: int) -> npt.NDArray[np.float_]:
+            return np.array(vectors, dtype=np.float64).reshape(len(collisions), size)
 
-@dataclass
-class _Box:
-    # The 8 coordinates of the box. Order is irrelevant.
-    coordinates: Tuple[
-        Vector3, Vector3, Vector3, Vector3, Vector3, Vector3, Vector3, Vector3
-    ]
-
-    def rotate(self, rotation: Quaternion) -> None:
-        self.coordinates = tuple(rotation * coord for coord in self.coordinates)  # type: ignore # TODO this whole file needs a cleanup
-
-    def translate(self, offset: Vector3) -> None:
-        self.coordinates = tuple(coord + offset for coord in self.coordinates)  # type: ignore # TODO this whole file needs a cleanup
-
-    def aabb(self) -> BoundingBox:
-        xmax = max([coord.x for coord in self.coordinates])
-        ymax = max([coord.y for coord in self.coordinates])
-        zmax = max([coord.z for coord in self.coordinates])
-        xmin = min([coord.x for coord in self.coordinates])
-        ymin = min([coord.y for coord in self.coordinates])
-        zmin = min([coord.z for coord in self.coordinates])
-        return BoundingBox(
-            Vector3([xmax - xmin, ymax - ymin, zmax - zmin]),
-            Vector3([(xmax + xmin) / 2.0, (ymax + ymin) / 2.0, (zmax + zmin) / 2.0]),
+        bounding_boxes = gather(
+            [collision.bounding_box for _, collision in collisions], 3
+        )
+        collision_positions = gather(
+            [collision.position for _, collision in collisions], 3
         )
+        collision_orientations = gather(
+            [collision.orientation for _, collision in collisions], 4
+        )
+        body_positions = gather([body.position for body, _ in collisions], 3)
+        body_orientations = gather([body.orientation for body, _ in collisions], 4)
+
+        # (collisions, 8, 3) corners of all boxes in world coordinates
+        corners = _BOX_CORNER_SIGNS * bounding_boxes[:, np.newaxis, :] / 2.0
+        corners = _rotate(collision_orientations, corners)
+        corners += collision_positions[:, np.newaxis, :]
+        corners = _rotate(body_orientations, corners)
+        corners += body_positions[:, np.newaxis, :]
+
+        # bounds of every box, calculated from its center and size
+        box_max = np.max(corners, axis=1, initial=-np.inf)
+        box_min = np.min(corners, axis=1, initial=np.inf)
+        box_offsets = (box_max + box_min) / 2.0
+        box_sizes = box_max - box_min
+
+        high = np.max(box_offsets + box_sizes / 2.0, axis=0, initial=0.0)
+        low = np.min(box_offsets - box_sizes / 2.0, axis=0, initial=0.0)
+
+        return BoundingBox(Vector3(high - low), Vector3((high + low) / 2.0))
+
+
+def _rotate(
+    quaternions: npt.NDArray[np.float_], vectors: npt.NDArray[np.float_]
+) -> npt.NDArray[np.float_]:
+    """
+    Rotate vectors by quaternions, using the same operations as pyrr so results are identical.
+
+    :param quaternions: (n, 4) quaternions(xyzw).
+    :param vectors: (n, m, 3) vectors. Vector [i, j] is rotated by quaternion i.
+    :returns: (n, m, 3) rotated vectors.
+    """
+    quaternions = quaternions[:, np.newaxis, :]
+    conjugates = quaternions * np.array([-1.0, -1.0, -1.0, 1.0])
+    vectors4 = np.concatenate([vectors, np.zeros(vectors.shape[:-1] + (1,))], axis=-1)
+    return _cross(quaternions, _cross(vectors4, conjugates))[..., 0:3]
+
+
+def _cross(
+    quaternions1: npt.NDArray[np.float_], quaternions2: npt.NDArray[np.float_]
+) -> npt.NDArray[np.float_]:
+    """
+    Quaternion product over the last axis, same as `pyrr.quaternion.cross`.
+    """
+    q1x, q1y, q1z, q1w = np.moveaxis(quaternions1, -1, 0)
+    q2x, q2y, q2z, q2w = np.moveaxis(quaternions2, -1, 0)
+    return np.stack(
+        [
+            q1x * q2w + q1y * q2z - q1z * q2y + q1w * q2x,
+            -q1x * q2z + q1y * q2w + q1z * q2x + q1w * q2y,
+            q1x * q2y - q1y * q2x + q1z * q2w + q1w * q2z,
+            -q1x * q2x - q1y * q2y - q1z * q2z + q1w * q2w,
+        ],
+        axis=-1,
+    )
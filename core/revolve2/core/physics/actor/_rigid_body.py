@@ -1,6 +1,10 @@
+from __future__ import annotations
+
 from dataclasses import dataclass, field
-from typing import List
+from typing import Any, Iterable, List, Optional, SupportsIndex, Union
 
+import numpy as np
+import numpy.typing as npt
 from pyrr import Matrix33, Vector3
 from pyrr.objects.quaternion import Quaternion
 
@@ -8,6 +12,68 @@ from ._collision import Collision
 from ._visual import Visual
 
 
+class _CollisionList(List[Collision]):
+    """
+    List of collisions that counts the changes made to it,
+    so mass properties can be checked for changes without comparing all collisions.
+    """
+
+    # incremented on every change.
+    # a class default, because unpickling fills the list before restoring its attributes.
+    version: int = 0
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        super().__setitem__(index, value)
+        self.version += 1
+
+    def __delitem__(self, index: Union[SupportsIndex, slice]) -> None:
+        super().__delitem__(index)
+        self.version += 1
+
+    def __iadd__(self, collisions: Iterable[Collision]) -> _CollisionList:
+        super().__iadd__(collisions)
+        self.version += 1
+        return self
+
+    def __imul__(self, count: SupportsIndex) -> _CollisionList:
+        super().__imul__(count)
+        self.version += 1
+        return self
+
+    def append(self, collision: Collision) -> None:
+        super().append(collision)
+        self.version += 1
+
+    def extend(self, collisions: Iterable[Collision]) -> None:
+        super().extend(collisions)
+        self.version += 1
+
+    def insert(self, index: SupportsIndex, collision: Collision) -> None:
+        super().insert(index, collision)
+        self.version += 1
+
+    def pop(self, index: SupportsIndex = -1) -> Collision:
+        collision = super().pop(index)
+        self.version += 1
+        return collision
+
+    def remove(self, collision: Collision) -> None:
+        super().remove(collision)
+        self.version += 1
+
+    def clear(self) -> None:
+        super().clear()
+        self.version += 1
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        super().sort(*args, **kwargs)
+        self.version += 1
+
+    def reverse(self) -> None:
+        super().reverse()
+        self.version += 1
+
+
 @dataclass
 class RigidBody:
     name: str
@@ -15,59 +81,183 @@ class RigidBody:
     orientation: Quaternion
     static_friction: float
     dynamic_friction: float
-    collisions: List[Collision] = field(default_factory=list, init=False)
+    collisions: List[Collision] = field(default_factory=_CollisionList, init=False)
     visuals: List[Visual] = field(default_factory=list, init=False)
+    _mass_properties: Optional[_MassProperties] = field(
+        default=None, init=False, repr=False, compare=False
+    )  # calculated when first required and recalculated when the collisions change
 
     def mass(self) -> float:
-        return sum(collision.mass for collision in self.collisions)
+        return self._get_mass_properties().mass
 
     def center_of_mass(self) -> Vector3:
-        return (
-            sum(collision.mass * collision.position for collision in self.collisions)
-            / self.mass()
-        )
+        return Vector3(self._get_mass_properties().center_of_mass.copy())
 
     def inertia_tensor(self) -> Matrix33:
-        com = self.center_of_mass()
-        inertia = Matrix33()
-
-        for collision in self.collisions:
-            # calculate inertia in local coordinates
-            local_inertia = Matrix33()
-            local_inertia[0][0] += (
-                collision.mass
-                * (collision.bounding_box.y**2 + collision.bounding_box.z**2)
-                / 12.0
-            )
-            local_inertia[1][1] += (
-                collision.mass
-                * (collision.bounding_box.x**2 + collision.bounding_box.z**2)
-                / 12.0
-            )
-            inertia[2][2] += (
-                collision.mass
-                * (collision.bounding_box.x**2 + collision.bounding_box.y**2)
-                / 12.0
-            )
+        return Matrix33(self._get_mass_properties().inertia_tensor.copy())
 
-            # convert to global coordinates
-            translation = Matrix33()
-            translation[0][0] += collision.mass * (
-                (collision.position.y - com.y) ** 2
-                + (collision.position.z - com.z) ** 2
-            )
-            translation[1][1] += collision.mass * (
-                (collision.position.x - com.x) ** 2
-                + (collision.position.z - com.z) ** 2
-            )
-            translation[2][2] += collision.mass * (
-                (collision.position.x - com.x) ** 2
-                + (collision.position.y - com.y) ** 2
+    def invalidate_mass_properties(self) -> None:
+        """
+        Recalculate the mass properties when they are next required.
+
+        Any change to the list of collisions is detected automatically,
+        but this must be called after changing the values of existing collisions in place.
+        """
+        self._mass_properties = None
+
+    def _get_mass_properties(self) -> _MassProperties:
+        if self._mass_properties is None or not self._mass_properties.is_valid_for(
+            self.collisions
+        ):
+            self._mass_properties = _MassProperties(self.collisions)
+        return self._mass_properties
+
+
+class _MassProperties:
+    """
+    Mass properties of a rigid body, calculated for all its collision boxes at once.
+
+    Sums are accumulated in collision order, so results are identical to
+    summing the contribution of every collision one at a time.
+    """
+
+    collisions: List[Collision]  # the list the properties were calculated for
+    version: Optional[int]  # version of that list at the time, if it counts its changes
+    # (collisions, 11) mass, bounding box(xyz), position(xyz) and orientation(xyzw) of every collision
+    boxes: npt.NDArray[np.float_]
+    mass: float
+    center_of_mass: npt.NDArray[np.float_]  # (3,)
+    inertia_tensor: npt.NDArray[np.float_]  # (3, 3)
+
+    @staticmethod
+    def pack(collisions: List[Collision]) -> npt.NDArray[np.float_]:
+        return np.array(
+            [
+                [
+                    collision.mass,
+                    *collision.bounding_box,
+                    *collision.position,
+                    *collision.orientation,
+                ]
+                for collision in collisions
+            ],
+            dtype=np.float64,
+        ).reshape(len(collisions), 11)
+
+    def __init__(self, collisions: List[Collision]) -> None:
+        self.collisions = collisions
+        self.version = (
+            collisions.version if isinstance(collisions, _CollisionList) else None
+        )
+        boxes = self.pack(collisions)
+        self.boxes = boxes
+
+        masses = boxes[:, 0]
+        sizes = boxes[:, 1:4]
+        positions = boxes[:, 4:7]
+        orientations = boxes[:, 7:11]
+
+        self.mass = float(self._sum(masses))
+        with np.errstate(invalid="ignore"):  # nan for bodies without mass
+            self.center_of_mass = (
+                self._sum(masses[:, np.newaxis] * positions) / self.mass
             )
 
-            global_inertia = local_inertia * collision.orientation + translation
+        # inertia of every box around its own x and y axes. z is not rotated.
+        squared_sizes = _square(sizes)
+        local_inertias = np.zeros((len(boxes), 3, 3))
+        local_inertias[:, 0, 0] = (
+            masses * (squared_sizes[:, 1] + squared_sizes[:, 2]) / 12.0
+        )
+        local_inertias[:, 1, 1] = (
+            masses * (squared_sizes[:, 0] + squared_sizes[:, 2]) / 12.0
+        )
+        z_inertias = np.zeros((len(boxes), 3, 3))
+        z_inertias[:, 2, 2] = (
+            masses * (squared_sizes[:, 0] + squared_sizes[:, 1]) / 12.0
+        )
+
+        # parallel axis terms
+        squared_offsets = _square(positions - self.center_of_mass)
+        translations = np.zeros((len(boxes), 3, 3))
+        translations[:, 0, 0] = masses * (squared_offsets[:, 1] + squared_offsets[:, 2])
+        translations[:, 1, 1] = masses * (squared_offsets[:, 0] + squared_offsets[:, 2])
+        translations[:, 2, 2] = masses * (squared_offsets[:, 0] + squared_offsets[:, 1])
+
+        global_inertias = (
+            np.matmul(self._rotation_matrices(orientations), local_inertias)
+            + translations
+        )
+
+        # the z inertia of every box is added before the rest of its inertia
+        self.inertia_tensor = self._sum(
+            np.stack([z_inertias, global_inertias], axis=1).reshape(-1, 3, 3)
+        )
+
+    def is_valid_for(self, collisions: List[Collision]) -> bool:
+        """
+        Check if these are still the mass properties of the given collisions.
+        Constant time for the list of a rigid body, unless it was replaced by a plain list.
+        """
+        if isinstance(collisions, _CollisionList):
+            return collisions is self.collisions and collisions.version == self.version
+        # any list can be changed without notice, so compare all collisions
+        return np.array_equal(self.boxes, self.pack(collisions))
+
+    @staticmethod
+    def _sum(values: npt.NDArray[np.float_]) -> npt.NDArray[np.float_]:
+        """
+        Sum over the first axis, starting from zero and adding values one at a time.
+        """
+        total: npt.NDArray[np.float_] = np.cumsum(
+            np.concatenate([np.zeros((1,) + values.shape[1:]), values]), axis=0
+        )[-1]
+        return total
+
+    @staticmethod
+    def _rotation_matrices(
+        quaternions: npt.NDArray[np.float_],
+    ) -> npt.NDArray[np.float_]:
+        """
+        Same as `pyrr.matrix33.create_from_quaternion`, for many quaternions.
+        """
+        norms = np.linalg.norm(quaternions, axis=1)
+        unnormalized = ~np.isclose(norms, 1.0)
+        quaternions = quaternions.copy()
+        quaternions[unnormalized] = (
+            quaternions[unnormalized].T
+            / np.sqrt(np.sum(quaternions[unnormalized] ** 2, axis=-1))
+        ).T
+
+        qx, qy, qz, qw = quaternions.T
+
+        sqw = _square(qw)
+        sqx = _square(qx)
+        sqy = _square(qy)
+        sqz = _square(qz)
+        qxy = qx * qy
+        qzw = qz * qw
+        qxz = qx * qz
+        qyw = qy * qw
+        qyz = qy * qz
+        qxw = qx * qw
+
+        invs = 1 / (sqx + sqy + sqz + sqw)
+        matrices = np.empty((len(quaternions), 3, 3))
+        matrices[:, 0, 0] = (sqx - sqy - sqz + sqw) * invs
+        matrices[:, 1, 1] = (-sqx + sqy - sqz + sqw) * invs
+        matrices[:, 2, 2] = (-sqx - sqy + sqz + sqw) * invs
+        matrices[:, 1, 0] = 2.0 * (qxy + qzw) * invs
+        matrices[:, 0, 1] = 2.0 * (qxy - qzw) * invs
+        matrices[:, 2, 0] = 2.0 * (qxz - qyw) * invs
+        matrices[:, 0, 2] = 2.0 * (qxz + qyw) * invs
+        matrices[:, 2, 1] = 2.0 * (qyz + qxw) * invs
+        matrices[:, 1, 2] = 2.0 * (qyz - qxw) * invs
+        return matrices
 
-            # add to rigid body inertia tensor
-            inertia += global_inertia
 
-        return inertia
+def _square(values: npt.NDArray[np.float_]) -> npt.NDArray[np.float_]:
+    # rounds the same as squaring numpy scalars, which pyrr does,
+    # while `values**2` sometimes differs in the last bit
+    squares: npt.NDArray[np.float_] = np.float_power(values, 2)
+    return squares
@@ -1,3 +1,3 @@
-from ._to_urdf import to_urdf
+from ._to_urdf import to_urdf, write_urdf
 
-__all__ = ["to_urdf"]
+__all__ = ["to_urdf", "write_urdf"]
@@ -1,7 +1,7 @@
+import io
 import warnings
-import xml.dom.minidom as minidom
-import xml.etree.ElementTree as xml
-from typing import Dict, List, Optional, Tuple, cast
+import xml.sax.saxutils
+from typing import Dict, List, Optional, TextIO, Tuple, cast
 
 import scipy.spatial.transform
 from pyrr import Quaternion, Vector3
@@ -16,9 +16,38 @@ def to_urdf(
     name: str,
     position: Vector3,
     orientation: Quaternion,
+    pretty: bool = False,
 ) -> str:
-    urdf = xml.Element("robot", {"name": name})
-
+    """
+    Create a urdf description of an actor.
+
+    :param physics_robot: The actor.
+    :param name: Name of the robot.
+    :param position: Position of the robot.
+    :param orientation: Orientation of the robot.
+    :param pretty: Indent every element on its own line, for human readers.
+                   Otherwise the description is written without any whitespace between elements.
+    :returns: The urdf.
+    """
+    output = io.StringIO()
+    write_urdf(physics_robot, name, position, orientation, output, pretty)
+    return output.getvalue()
+
+
+def write_urdf(
+    physics_robot: Actor,
+    name: str,
+    position: Vector3,
+    orientation: Quaternion,
+    file: TextIO,
+    pretty: bool = False,
+) -> None:
+    """
+    Write a urdf description of an actor to a file, in a single pass.
+    Same as `to_urdf`, but writes to a file instead of creating a string.
+
+    :param file: File to write to.
+    """
     tree: Dict[str, List[Joint]] = {}  # parent to children
     seen_children = set()
     for joint in physics_robot.joints:
@@ -44,50 +73,101 @@ def to_urdf(
             "Physics robot cannot be converted to urdf. Require at least one body."
         )
 
+    writer = _Writer(file, pretty)
+    writer.declaration()
+    writer.open("robot", {"name": name})
     # pass negative position and inverse of orientation of robot to first element
     # so the robot will be positioned and rotated accordingly because the first link tries to compensate
-    for el in _make_links(root, tree, -position, orientation.inverse):
-        urdf.append(el)
+    _write_links(writer, root, tree, -position, orientation.inverse)
+    writer.close("robot")
+
+
+class _Writer:
+    """
+    Writes xml elements directly to a file.
+
+    Pretty output is formatted like `xml.dom.minidom` with an indent of four spaces,
+    compact output like `xml.etree.ElementTree`.
+    """
+
+    _file: TextIO
+    _pretty: bool
+    _depth: int
+
+    def __init__(self, file: TextIO, pretty: bool) -> None:
+        self._file = file
+        self._pretty = pretty
+        self._depth = 0
+
+    def declaration(self) -> None:
+        if self._pretty:
+            self._file.write('<?xml version="1.0" ?>\n')
+
+    def open(self, tag: str, attributes: Optional[Dict[str, str]] = None) -> None:
+        self._write_tag(f"<{tag}{self._attributes(attributes or {})}>")
+        self._depth += 1
+
+    def close(self, tag: str) -> None:
+        self._depth -= 1
+        self._write_tag(f"</{tag}>")
+
+    def empty(self, tag: str, attributes: Dict[str, str]) -> None:
+        """
+        Write an element without children.
+        """
+        if self._pretty:
+            self._write_tag(f"<{tag}{self._attributes(attributes)}/>")
+        else:
+            self._write_tag(f"<{tag}{self._attributes(attributes)} />")
+
+    def _write_tag(self, tag: str) -> None:
+        if self._pretty:
+            self._file.write(f"{'    ' * self._depth}{tag}\n")
+        else:
+            self._file.write(tag)
+
+    @staticmethod
+    def _attributes(attributes: Dict[str, str]) -> str:
+        return "".join(
+            f' {key}="{xml.sax.saxutils.escape(value, _ATTRIBUTE_ENTITIES)}"'
+            for key, value in attributes.items()
+        )
+
 
-    return cast(
-        str,
-        minidom.parseString(
-            xml.tostring(urdf, encoding="unicode", method="xml")
-        ).toprettyxml(indent="    "),
-    )  # TODO for some reason the stubs for parseString have no proper return type. investigate
+# entities to escape in attribute values, in addition to &, < and >
+_ATTRIBUTE_ENTITIES = {'"': "&quot;"}
 
 
-def _make_links(
+def _write_links(
+    writer: _Writer,
     body: RigidBody,
     tree: Dict[str, List[Joint]],
     link_pos: Vector3,
     link_ori: Quaternion,
-) -> List[xml.Element]:
-    elements = []
+) -> None:
+    writer.open("link", {"name": body.name})
 
-    link = xml.Element("link", {"name": body.name})
-    elements.append(link)
+    link_ori_inverse = link_ori.inverse
+    body_ori = link_ori_inverse * body.orientation  # relative to the link
 
-    com_xyz = link_ori.inverse * (
+    com_xyz = link_ori_inverse * (
         body.position - link_pos + body.orientation * body.center_of_mass()
     )
-    com_rpy = _quaternion_to_euler(link_ori.inverse * body.orientation)
+    com_rpy = _quaternion_to_euler(body_ori)
     inertia = (
         body.inertia_tensor()
     )  # TODO orientation of individual collisions on this function
 
-    inertial = xml.SubElement(link, "inertial")
-    xml.SubElement(
-        inertial,
+    writer.open("inertial")
+    writer.empty(
         "origin",
         {
             "rpy": f"{com_rpy[0]} {com_rpy[1]} {com_rpy[2]}",
             "xyz": f"{com_xyz[0]} {com_xyz[1]} {com_xyz[2]}",
         },
     )
-    xml.SubElement(inertial, "mass", {"value": "{:e}".format(body.mass())})
-    xml.SubElement(
-        inertial,
+    writer.empty("mass", {"value": "{:e}".format(body.mass())})
+    writer.empty(
         "inertia",
         {
             "ixx": "{:e}".format(inertia[0][0]),
@@ -98,50 +178,53 @@ def _make_links(
             "izz": "{:e}".format(inertia[2][2]),
         },
     )
+    writer.close("inertial")
 
     for collision in body.collisions:
-        el = xml.SubElement(link, "collision", {"name": collision.name})
-        geometry = xml.SubElement(el, "geometry")
-        xml.SubElement(
-            geometry,
+        writer.open("collision", {"name": collision.name})
+        writer.open("geometry")
+        writer.empty(
             "box",
             {
                 "size": f"{collision.bounding_box[0]} {collision.bounding_box[1]} {collision.bounding_box[2]}"
             },
         )
-        xyz = link_ori.inverse * (
+        writer.close("geometry")
+        xyz = link_ori_inverse * (
             body.position - link_pos + body.orientation * collision.position
         )
-        rpy = _quaternion_to_euler(
-            link_ori.inverse * body.orientation * collision.orientation
-        )
-        xml.SubElement(
-            el,
+        rpy = _quaternion_to_euler(body_ori * collision.orientation)
+        writer.empty(
             "origin",
             {
                 "rpy": f"{rpy[0]} {rpy[1]} {rpy[2]}",
                 "xyz": f"{xyz[0]} {xyz[1]} {xyz[2]}",
             },
         )
+        writer.close("collision")
+
+    # visual = xml.SubElement(link, "visual")
+    # geometry = xml.SubElement(visual, "geometry")
+    # xml.SubElement(geometry, "box", {"size": "1 1 1"})
+
+    writer.close("link")
 
     if body.name in tree:
         for joint in tree[body.name]:
-            el = xml.Element("joint", name=joint.name, type="revolute")
-            xml.SubElement(el, "parent", {"link": body.name})
-            xml.SubElement(el, "child", {"link": joint.body2.name})
-            xyz = link_ori.inverse * (joint.position - link_pos)
-            rpy = _quaternion_to_euler(link_ori.inverse * joint.orientation)
-            xml.SubElement(
-                el,
+            writer.open("joint", {"name": joint.name, "type": "revolute"})
+            writer.empty("parent", {"link": body.name})
+            writer.empty("child", {"link": joint.body2.name})
+            xyz = link_ori_inverse * (joint.position - link_pos)
+            rpy = _quaternion_to_euler(link_ori_inverse * joint.orientation)
+            writer.empty(
                 "origin",
                 {
                     "rpy": f"{rpy[0]} {rpy[1]} {rpy[2]}",
                     "xyz": f"{xyz[0]} {xyz[1]} {xyz[2]}",
                 },
             )
-            xml.SubElement(el, "axis", {"xyz": "0 1 0"})
-            xml.SubElement(
-                el,
+            writer.empty("axis", {"xyz": "0 1 0"})
+            writer.empty(
                 "limit",
                 {
                     "lower": f"{-joint.range}",
@@ -150,20 +233,15 @@ def _make_links(
                     "velocity": f"{joint.velocity}",
                 },
             )
-            elements.append(el)
-            elements += _make_links(
+            writer.close("joint")
+            _write_links(
+                writer,
                 joint.body2,
                 tree,
                 joint.position,
                 joint.orientation,
             )
 
-    # visual = xml.SubElement(link, "visual")
-    # geometry = xml.SubElement(visual, "geometry")
-    # xml.SubElement(geometry, "box", {"size": "1 1 1"})
-
-    return elements
-
 
 def _quaternion_to_euler(quaternion: Quaternion) -> Tuple[float, float, float]:
     with warnings.catch_warnings():
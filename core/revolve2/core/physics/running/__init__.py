@@ -1,17 +1,25 @@
 from ._actor_control import ActorControl
 from ._batch import Batch
+from ._batch_results import BatchResults
+from ._cumulative_displacement import CumulativeDisplacement
 from ._environment import Environment
+from ._max_height import MaxHeight
 from ._posed_actor import PosedActor
 from ._runner import Runner
 from ._state import ActorState, EnvironmentState, RunnerState
+from ._state_reduction import StateReduction
 
 __all__ = [
     "ActorControl",
     "Batch",
+    "BatchResults",
+    "CumulativeDisplacement",
     "Environment",
+    "MaxHeight",
     "PosedActor",
     "Runner",
     "ActorState",
     "EnvironmentState",
     "RunnerState",
+    "StateReduction",
 ]
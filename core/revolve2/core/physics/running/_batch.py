@@ -3,6 +3,7 @@ from typing import Callable, List
 
 from ._actor_control import ActorControl
 from ._environment import Environment
+from ._state_reduction import StateReduction
 
 
 @dataclass
@@ -17,4 +18,16 @@ class Batch:
     sampling_frequency: float
     control_frequency: float  # Hz. See `sampling_frequency`, but for actor control.
     control: Callable[[float, ActorControl], None]  # (dt, control) -> None
+
+    """
+    If True, only the initial and final state are recorded.
+    States are still sampled at `sampling_frequency` to update the `reductions`.
+    """
+    endpoints_only: bool = False
+    """
+    Summaries of the states that are calculated while running.
+    Their results are available in the returned `BatchResults`, in the same order.
+    """
+    reductions: List[StateReduction] = field(default_factory=list)
+
     environments: List[Environment] = field(default_factory=list, init=False)
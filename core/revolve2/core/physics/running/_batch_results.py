@@ -0,0 +1,127 @@
+"""
+BatchResults class
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Union, overload
+
+import numpy as np
+import numpy.typing as npt
+from pyrr import Quaternion, Vector3
+
+from ._state import ActorState, EnvironmentState, RunnerState
+
+
+class BatchResults(Sequence[RunnerState]):
+    """
+    States sampled while running a batch, stored column-wise in arrays.
+
+    Indexing creates `RunnerState` objects on the fly,
+    so this can be used as the list of states in ascending order of time it replaces.
+    Code that processes many states should use the arrays directly.
+    """
+
+    time_seconds: npt.NDArray[np.float_]  # (samples,)
+    """
+    (samples, environments, actors, 7).
+    Position(xyz) followed by orientation(xyzw) of every actor.
+    Environments with less actors than others are padded with nan.
+    """
+    poses: npt.NDArray[np.float_]
+    num_actors: List[int]  # number of actors in every environment
+    """
+    (environments, actors) values of every `StateReduction` in the batch, in the same order.
+    """
+    reductions: List[npt.NDArray[np.float_]]
+
+    def __init__(
+        self,
+        time_seconds: npt.NDArray[np.float_],
+        poses: npt.NDArray[np.float_],
+        num_actors: List[int],
+        reductions: Optional[List[npt.NDArray[np.float_]]] = None,
+    ) -> None:
+        assert time_seconds.ndim == 1
+        assert poses.ndim == 4
+        assert poses.shape[0] == time_seconds.shape[0]
+        assert poses.shape[1] == len(num_actors)
+        assert poses.shape[3] == 7
+
+        self.time_seconds = time_seconds
+        self.poses = poses
+        self.num_actors = num_actors
+        self.reductions = [] if reductions is None else reductions
+
+    @classmethod
+    def from_states(cls, states: List[RunnerState]) -> BatchResults:
+        """
+        Convert a list of states to columnar results.
+
+        :param states: States in ascending order of time. All must contain the same environments and actors.
+        """
+        assert len(states) > 0
+
+        num_actors = [len(env.actor_states) for env in states[0].envs]
+        poses = np.full(
+            (len(states), len(num_actors), max(num_actors, default=0), 7), np.nan
+        )
+        for state_index, state in enumerate(states):
+            for env_index, env in enumerate(state.envs):
+                for actor_index, actor_state in enumerate(env.actor_states):
+                    pose = poses[state_index, env_index, actor_index]
+                    pose[0:3] = actor_state.position
+                    pose[3:7] = actor_state.orientation
+
+        return BatchResults(
+            np.array([state.time_seconds for state in states]), poses, num_actors
+        )
+
+    @property
+    def positions(self) -> npt.NDArray[np.float_]:
+        """
+        (samples, environments, actors, 3) view of the positions of all actors.
+        """
+        return self.poses[..., 0:3]
+
+    @property
+    def orientations(self) -> npt.NDArray[np.float_]:
+        """
+        (samples, environments, actors, 4) view of the orientations(xyzw) of all actors.
+        """
+        return self.poses[..., 3:7]
+
+    def __len__(self) -> int:
+        return len(self.time_seconds)
+
+    @overload
+    def __getitem__(self, index: int) -> RunnerState: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> BatchResults: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[RunnerState, BatchResults]:
+        if isinstance(index, slice):
+            return BatchResults(
+                self.time_seconds[index],
+                self.poses[index],
+                self.num_actors,
+                self.reductions,
+            )
+
+        poses = self.poses[index]
+        return RunnerState(
+            float(self.time_seconds[index]),
+            [
+                EnvironmentState(
+                    [
+                        ActorState(
+                            Vector3(pose[0:3].astype(np.float64)),
+                            Quaternion(pose[3:7].astype(np.float64)),
+                        )
+                        for pose in env_poses[0:num_actors]
+                    ]
+                )
+                for env_poses, num_actors in zip(poses, self.num_actors)
+            ],
+        )
@@ -0,0 +1,31 @@
+import numpy as np
+import numpy.typing as npt
+
+from ._state_reduction import StateReduction
+
+
+class CumulativeDisplacement(StateReduction):
+    """
+    Total distance traveled by every actor, summed over all samples.
+    """
+
+    _axes: slice
+
+    def __init__(self, planar: bool = True) -> None:
+        """
+        :param planar: If True, only movement on the xy plane is counted.
+        """
+        self._axes = slice(0, 2) if planar else slice(0, 3)
+
+    def initial(self, poses: npt.NDArray[np.float_]) -> npt.NDArray[np.float_]:
+        return np.zeros(poses.shape[0:2])
+
+    def update(
+        self,
+        values: npt.NDArray[np.float_],
+        previous_poses: npt.NDArray[np.float_],
+        poses: npt.NDArray[np.float_],
+    ) -> None:
+        values += np.linalg.norm(
+            poses[..., self._axes] - previous_poses[..., self._axes], axis=-1
+        )
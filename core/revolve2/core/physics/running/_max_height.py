@@ -0,0 +1,21 @@
+import numpy as np
+import numpy.typing as npt
+
+from ._state_reduction import StateReduction
+
+
+class MaxHeight(StateReduction):
+    """
+    Highest z coordinate every actor reached over all samples.
+    """
+
+    def initial(self, poses: npt.NDArray[np.float_]) -> npt.NDArray[np.float_]:
+        return poses[..., 2].astype(np.float64)
+
+    def update(
+        self,
+        values: npt.NDArray[np.float_],
+        previous_poses: npt.NDArray[np.float_],
+        poses: npt.NDArray[np.float_],
+    ) -> None:
+        np.fmax(values, poses[..., 2], out=values)
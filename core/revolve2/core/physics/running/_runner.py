@@ -3,10 +3,9 @@ Runner class
 """
 
 from abc import ABC, abstractmethod
-from typing import List
 
 from ._batch import Batch
-from ._state import RunnerState
+from ._batch_results import BatchResults
 
 
 class Runner(ABC):
@@ -16,10 +15,10 @@ class Runner(ABC):
     """
 
     @abstractmethod
-    async def run_batch(self, batch: Batch) -> List[RunnerState]:
+    async def run_batch(self, batch: Batch) -> BatchResults:
         """
         Simulate the provided batch.
 
-        :return: List of simulation states in ascending order of time.
+        :return: Simulation states in ascending order of time.
         """
         pass
@@ -0,0 +1,45 @@
+"""
+StateReduction class
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+import numpy.typing as npt
+
+
+class StateReduction(ABC):
+    """
+    Interface for summaries of the states of all actors over a whole batch.
+
+    Runners update reductions every time states are sampled,
+    so a summary can be obtained without keeping the intermediate states.
+    Implementations must be picklable, as runners may evaluate them in another process.
+
+    Poses are (environments, actors, 7) arrays with position(xyz) followed by orientation(xyzw).
+    Environments with less actors than others are padded with nan.
+    """
+
+    @abstractmethod
+    def initial(self, poses: npt.NDArray[np.float_]) -> npt.NDArray[np.float_]:
+        """
+        Create the reduced values for the first sample.
+
+        :param poses: Poses of the first sample.
+        :return: (environments, actors) array with a value for every actor.
+        """
+
+    @abstractmethod
+    def update(
+        self,
+        values: npt.NDArray[np.float_],
+        previous_poses: npt.NDArray[np.float_],
+        poses: npt.NDArray[np.float_],
+    ) -> None:
+        """
+        Update the reduced values in place with a new sample.
+
+        :param values: Values as created by `initial`.
+        :param previous_poses: Poses of the previous sample.
+        :param poses: Poses of the new sample.
+        """
@@ -4,6 +4,7 @@
 # for why it is at the time of writing not possible to create a dev_requirements.txt
 
 pip install -e ./runners/isaacgym[dev] && \
+pip install -e ./runners/kinematic[dev] && \
 pip install -e ./genotypes/cppnwin[dev] && \
 pip install -e ./core[dev] && \
 pip install -e ./rpi_controller[dev] && \
@@ -5,22 +5,17 @@ from typing import List, Tuple
 import numpy as np
 import numpy.typing as npt
 from pyrr import Quaternion, Vector3
-from revolve2.actor_controllers.cpg import CpgNetworkStructure
+from revolve2.actor_controllers.cpg import BatchedCpgController, CpgNetworkStructure
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio.session import AsyncSession
 
-from revolve2.actor_controller import ActorController
 from revolve2.core.modular_robot import Body, ModularRobot
-from revolve2.core.modular_robot.brains import (
-    BrainCpgNetworkStatic,
-    make_cpg_network_structure_neighbour,
-)
+from revolve2.core.modular_robot.brains import make_cpg_network_structure_neighbour
 from revolve2.core.optimization import ProcessIdGen
 from revolve2.core.optimization.ea.openai_es import OpenaiESOptimizer
 from revolve2.core.physics.actor import Actor
 from revolve2.core.physics.running import (
     ActorControl,
-    ActorState,
     Batch,
     Environment,
     PosedActor,
@@ -36,7 +31,7 @@ class Optimizer(OpenaiESOptimizer):
     _cpg_network_structure: CpgNetworkStructure
 
     _runner: Runner
-    _controllers: List[ActorController]
+    _controller: BatchedCpgController  # controls the robots of all environments
 
     _simulation_time: int
     _sampling_frequency: float
@@ -148,28 +143,25 @@ class Optimizer(OpenaiESOptimizer):
             sampling_frequency=self._sampling_frequency,
             control_frequency=self._control_frequency,
             control=self._control,
+            endpoints_only=True,  # fitness only depends on the initial and final state
         )
 
-        self._controllers = []
-
-        for params in population:
-            initial_state = self._cpg_network_structure.make_uniform_state(
-                0.5 * math.pi / 2.0
-            )
-            weight_matrix = self._cpg_network_structure.make_weight_matrix_from_params(
-                params
-            )
-            dof_ranges = self._cpg_network_structure.make_uniform_dof_ranges(1.0)
-            brain = BrainCpgNetworkStatic(
-                initial_state,
-                self._cpg_network_structure.num_cpgs,
-                weight_matrix,
-                dof_ranges,
-            )
-            controller = brain.make_controller(self._body, self._dof_ids)
+        # every robot has the same body, so all controllers are stepped as one batch
+        initial_state = self._cpg_network_structure.make_uniform_state(
+            0.5 * math.pi / 2.0
+        )
+        dof_ranges = self._cpg_network_structure.make_uniform_dof_ranges(1.0)
+        self._controller = BatchedCpgController(
+            [initial_state for _ in population],
+            [self._cpg_network_structure.num_cpgs for _ in population],
+            list(
+                self._cpg_network_structure.make_weight_matrices_from_params(population)
+            ),
+            [dof_ranges for _ in population],
+        )
 
-            bounding_box = self._actor.calc_aabb()
-            self._controllers.append(controller)
+        bounding_box = self._actor.calc_aabb()
+        for _ in population:
             env = Environment()
             env.actors.append(
                 PosedActor(
@@ -182,37 +174,32 @@ class Optimizer(OpenaiESOptimizer):
                         ]
                     ),
                     Quaternion(),
-                    [0.0 for _ in controller.get_dof_targets()],
+                    [0.0 for _ in range(self._cpg_network_structure.num_cpgs)],
                 )
             )
             batch.environments.append(env)
 
-        states = await self._runner.run_batch(batch)
+        results = await self._runner.run_batch(batch)
 
-        return np.array(
-            [
-                self._calculate_fitness(
-                    states[0].envs[i].actor_states[0],
-                    states[-1].envs[i].actor_states[0],
-                )
-                for i in range(len(population))
-            ]
+        return self._calculate_fitness(
+            results.positions[0, :, 0], results.positions[-1, :, 0]
         )
 
     def _control(self, dt: float, control: ActorControl) -> None:
-        for control_i, controller in enumerate(self._controllers):
-            controller.step(dt)
-            control.set_dof_targets(control_i, 0, controller.get_dof_targets())
+        self._controller.step(dt)
+        for control_i, targets in enumerate(
+            self._controller.get_dof_targets().tolist()
+        ):
+            control.set_dof_targets(control_i, 0, targets)
 
     @staticmethod
-    def _calculate_fitness(begin_state: ActorState, end_state: ActorState) -> float:
+    def _calculate_fitness(
+        begin_positions: npt.NDArray[np.float_], end_positions: npt.NDArray[np.float_]
+    ) -> npt.NDArray[np.float_]:
         # TODO simulation can continue slightly passed the defined sim time.
 
-        # distance traveled on the xy plane
-        return math.sqrt(
-            (begin_state.position[0] - end_state.position[0]) ** 2
-            + ((begin_state.position[1] - end_state.position[1]) ** 2)
-        )
+        # distance traveled on the xy plane, for every environment at once
+        return np.linalg.norm(end_positions[:, 0:2] - begin_positions[:, 0:2], axis=1)
 
     def _must_do_next_gen(self) -> bool:
         return self.generation_number != self._num_generations
@@ -1,9 +1,10 @@
-import math
 import pickle
 from random import Random
 from typing import List, Tuple
 
 import multineat
+import numpy as np
+import numpy.typing as npt
 import sqlalchemy
 from genotype import Genotype, GenotypeSerializer, crossover, develop, mutate
 from pyrr import Quaternion, Vector3
@@ -21,7 +22,6 @@ from revolve2.core.optimization import ProcessIdGen
 from revolve2.core.optimization.ea.generic_ea import EAOptimizer
 from revolve2.core.physics.running import (
     ActorControl,
-    ActorState,
     Batch,
     Environment,
     PosedActor,
@@ -209,6 +209,7 @@ class Optimizer(EAOptimizer[Genotype, float]):
             sampling_frequency=self._sampling_frequency,
             control_frequency=self._control_frequency,
             control=self._control,
+            endpoints_only=True,  # fitness only depends on the initial and final state
         )
 
         self._controllers = []
@@ -234,15 +235,11 @@ class Optimizer(EAOptimizer[Genotype, float]):
             )
             batch.environments.append(env)
 
-        states = await self._runner.run_batch(batch)
+        results = await self._runner.run_batch(batch)
 
-        return [
-            self._calculate_fitness(
-                states[0].envs[i].actor_states[0],
-                states[-1].envs[i].actor_states[0],
-            )
-            for i in range(len(genotypes))
-        ]
+        return self._calculate_fitness(
+            results.positions[0, :, 0], results.positions[-1, :, 0]
+        )
 
     def _control(self, dt: float, control: ActorControl) -> None:
         for control_i, controller in enumerate(self._controllers):
@@ -250,16 +247,16 @@ class Optimizer(EAOptimizer[Genotype, float]):
             control.set_dof_targets(control_i, 0, controller.get_dof_targets())
 
     @staticmethod
-    def _calculate_fitness(begin_state: ActorState, end_state: ActorState) -> float:
+    def _calculate_fitness(
+        begin_positions: npt.NDArray[np.float_], end_positions: npt.NDArray[np.float_]
+    ) -> List[float]:
         # TODO simulation can continue slightly passed the defined sim time.
 
-        # distance traveled on the xy plane
-        return float(
-            math.sqrt(
-                (begin_state.position[0] - end_state.position[0]) ** 2
-                + ((begin_state.position[1] - end_state.position[1]) ** 2)
-            )
-        )
+        # distance traveled on the xy plane, for every environment at once
+        distances: List[float] = np.linalg.norm(
+            end_positions[:, 0:2] - begin_positions[:, 0:2], axis=1
+        ).tolist()
+        return distances
 
     def _on_generation_checkpoint(self, session: AsyncSession) -> None:
         session.add(
@@ -6,5 +6,6 @@ cd "$(dirname "$0")"
 ../rpi_controller/run_mypy.sh && \
 ../core/run_mypy.sh && \
 ../genotypes/cppnwin/run_mypy.sh && \
+../runners/kinematic/run_mypy.sh && \
 ../runners/isaacgym/run_mypy.sh && \
 ../examples/run_mypy.sh
@@ -1,23 +1,34 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
 import math
 import multiprocessing as mp
 import os
 import tempfile
+import traceback
 from dataclasses import dataclass
-from typing import List, Optional
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 
 import numpy as np
-from isaacgym import gymapi
+import numpy.typing as npt
+from isaacgym import gymapi, gymtorch
 from pyrr import Quaternion, Vector3
 
+# isaacgym must be imported before torch. torch is a dependency of isaacgym itself.
+import torch  # isort: skip
+
 from revolve2.core.physics.actor import Actor
 from revolve2.core.physics.actor.urdf import to_urdf as physbot_to_urdf
 from revolve2.core.physics.running import (
     ActorControl,
-    ActorState,
     Batch,
-    EnvironmentState,
+    BatchResults,
+    Environment,
     Runner,
-    RunnerState,
+    StateReduction,
 )
 
 
@@ -41,17 +52,71 @@ class LocalRunner(Runner):
         _gymenvs: List[
             GymEnv
         ]  # environments, in same order as provided by batch description
+        _assets_by_urdf: Dict[str, gymapi.Asset]  # sha256 of urdf to loaded asset
+        _assets_by_actor: Dict[int, gymapi.Asset]  # id of actor object to loaded asset
+
+        _root_states: npt.NDArray[
+            np.float32
+        ]  # view of the isaac gym actor root state tensor
+        _root_state_indices: npt.NDArray[
+            np.int64
+        ]  # index in root state tensor for every actor, env by env
+        _poses: npt.NDArray[
+            np.float32
+        ]  # preallocated. position and orientation(xyzw) of every actor, env by env
+        _pose_env_indices: npt.NDArray[np.int64]  # env index of every row in `_poses`
+        _pose_actor_indices: npt.NDArray[
+            np.int64
+        ]  # actor index in env of every row in `_poses`
+        _current_poses: npt.NDArray[
+            np.float32
+        ]  # (envs, max actors, 7) poses of the last sample. padded with nan.
+        _previous_poses: npt.NDArray[
+            np.float32
+        ]  # like `_current_poses`, for the sample before
+        _num_samples: int  # number of samples taken so far, including unrecorded ones
+        _reduction_values: List[npt.NDArray[np.float_]]  # one for every batch reduction
+
+        _dof_targets: npt.NDArray[np.float32]  # dof position targets of the whole sim
+        _dof_targets_tensor: torch.Tensor  # shares memory with `_dof_targets`
+        _dof_ranges: npt.NDArray[np.float32]  # joint range of every dof in the sim
+        _dof_slices: List[
+            List[Tuple[int, int]]
+        ]  # (first dof index in sim, number of dofs) for every actor in every env
+        _dof_order: npt.NDArray[
+            np.int64
+        ]  # index in sim of every dof, env by env, actor by actor
+        _dof_targets_source: Optional[
+            Callable[[float], npt.NDArray[np.float32]]
+        ]  # see `__init__`
 
         def __init__(
             self,
             batch: Batch,
             sim_params: gymapi.SimParams,
             headless: bool,
+            dof_targets_source: Optional[
+                Callable[[float], npt.NDArray[np.float32]]
+            ] = None,
         ):
+            """
+            :param dof_targets_source: If set, called with the control step to get the dof targets
+                                       instead of calling the control function of the batch.
+                                       Returns the targets of all dofs, env by env, actor by actor.
+            """
+            # the root state tensor is used as a numpy array that shares memory with the sim,
+            # and dof targets are passed as a cpu tensor.
+            # both are only possible when the sim runs on the cpu.
+            if sim_params.use_gpu_pipeline:
+                raise RuntimeError("The gpu pipeline is not supported.")
+
             self._gym = gymapi.acquire_gym()
             self._batch = batch
+            self._dof_targets_source = dof_targets_source
 
             self._sim = self._create_sim(sim_params)
+            self._assets_by_urdf = {}
+            self._assets_by_actor = {}
             self._gymenvs = self._create_envs()
 
             if headless:
@@ -61,6 +126,75 @@ class LocalRunner(Runner):
 
             self._gym.prepare_sim(self._sim)
 
+            # the tensor api can only be used after preparing the sim.
+            # with the cpu pipeline this is a view of the state, so we only need to refresh it.
+            # `cpu()` does not copy, because the gpu pipeline is refused above.
+            self._root_states = (
+                gymtorch.wrap_tensor(
+                    self._gym.acquire_actor_root_state_tensor(self._sim)
+                )
+                .cpu()
+                .numpy()
+            )
+            self._root_state_indices = np.array(
+                [
+                    self._gym.get_actor_index(
+                        gymenv.env, actor_handle, gymapi.DOMAIN_SIM
+                    )
+                    for gymenv in self._gymenvs
+                    for actor_handle in gymenv.actors
+                ],
+                dtype=np.int64,
+            )
+            self._poses = np.zeros(
+                (len(self._root_state_indices), 7), dtype=self._root_states.dtype
+            )
+            num_actors = [len(gymenv.actors) for gymenv in self._gymenvs]
+            self._pose_env_indices = np.repeat(np.arange(len(num_actors)), num_actors)
+            self._pose_actor_indices = np.concatenate(
+                [np.arange(n) for n in num_actors] + [np.zeros(0, dtype=np.int64)]
+            )
+            self._current_poses = np.full(
+                (len(num_actors), max(num_actors, default=0), 7),
+                np.nan,
+                dtype=np.float32,
+            )
+            self._previous_poses = self._current_poses.copy()
+            self._num_samples = 0
+            self._reduction_values = []
+
+            self._init_dof_targets()
+
+        def _init_dof_targets(self) -> None:
+            num_dofs = self._gym.get_sim_dof_count(self._sim)
+            self._dof_targets = np.zeros(num_dofs, dtype=np.float32)
+            # a cpu tensor, which is fine because the gpu pipeline is refused in `__init__`.
+            self._dof_targets_tensor = torch.from_numpy(self._dof_targets)
+            self._dof_ranges = np.zeros(num_dofs, dtype=np.float32)
+            self._dof_slices = []
+            dof_order: List[npt.NDArray[np.int64]] = []
+
+            for gymenv, env_descr in zip(self._gymenvs, self._batch.environments):
+                env_slices: List[Tuple[int, int]] = []
+                for actor_handle, posed_actor in zip(gymenv.actors, env_descr.actors):
+                    num_actor_dofs = len(posed_actor.actor.joints)
+                    if num_actor_dofs == 0:
+                        env_slices.append((0, 0))
+                        continue
+                    # dofs of a single actor are contiguous in the sim
+                    start = self._gym.get_actor_dof_index(
+                        gymenv.env, actor_handle, 0, gymapi.DOMAIN_SIM
+                    )
+                    end = start + num_actor_dofs
+                    self._dof_targets[start:end] = posed_actor.dof_states
+                    self._dof_ranges[start:end] = [
+                        joint.range for joint in posed_actor.actor.joints
+                    ]
+                    env_slices.append((start, num_actor_dofs))
+                    dof_order.append(np.arange(start, end))
+                self._dof_slices.append(env_slices)
+            self._dof_order = np.concatenate(dof_order + [np.zeros(0, dtype=np.int64)])
+
         def _create_sim(self, sim_params: gymapi.SimParams) -> gymapi.Sim:
             sim = self._gym.create_sim(type=gymapi.SIM_PHYSX, params=sim_params)
 
@@ -97,31 +231,7 @@ class LocalRunner(Runner):
                 gymenvs.append(gymenv)
 
                 for actor_index, posed_actor in enumerate(env_descr.actors):
-                    # sadly isaac gym can only read robot descriptions from a file,
-                    # so we create a temporary file.
-                    botfile = tempfile.NamedTemporaryFile(
-                        mode="r+", delete=False, suffix=".urdf"
-                    )
-                    botfile.writelines(
-                        physbot_to_urdf(
-                            posed_actor.actor,
-                            f"robot_{actor_index}",
-                            Vector3(),
-                            Quaternion(),
-                        )
-                    )
-                    botfile.close()
-                    asset_root = os.path.dirname(botfile.name)
-                    urdf_file = os.path.basename(botfile.name)
-                    asset_options = gymapi.AssetOptions()
-                    asset_options.angular_damping = 0.0
-                    actor_asset = self._gym.load_urdf(
-                        self._sim, asset_root, urdf_file, asset_options
-                    )
-                    os.remove(botfile.name)
-
-                    if actor_asset is None:
-                        raise RuntimeError()
+                    actor_asset = self._get_asset(posed_actor.actor)
 
                     pose = gymapi.Transform()
                     pose.p = gymapi.Vec3(
@@ -188,6 +298,46 @@ class LocalRunner(Runner):
 
             return gymenvs
 
+        def _get_asset(self, actor: Actor) -> gymapi.Asset:
+            """
+            Get the asset for an actor, loading it only if no identical actor has been loaded before.
+            Identical actors create identical urdf files, so assets are cached by the hash of their urdf.
+            """
+            asset = self._assets_by_actor.get(id(actor))
+            if asset is not None:
+                return asset
+
+            # the name is not used by isaac gym, actors are named when they are created.
+            urdf = physbot_to_urdf(actor, "robot", Vector3(), Quaternion())
+            urdf_hash = hashlib.sha256(urdf.encode()).hexdigest()
+
+            asset = self._assets_by_urdf.get(urdf_hash)
+            if asset is None:
+                # sadly isaac gym can only read robot descriptions from a file,
+                # so we create a temporary file.
+                botfile = tempfile.NamedTemporaryFile(
+                    mode="r+", delete=False, suffix=".urdf"
+                )
+                botfile.write(urdf)
+                botfile.close()
+                asset_root = os.path.dirname(botfile.name)
+                urdf_file = os.path.basename(botfile.name)
+                asset_options = gymapi.AssetOptions()
+                asset_options.angular_damping = 0.0
+                asset = self._gym.load_urdf(
+                    self._sim, asset_root, urdf_file, asset_options
+                )
+                os.remove(botfile.name)
+
+                if asset is None:
+                    raise RuntimeError()
+
+                self._assets_by_urdf[urdf_hash] = asset
+
+            # actors in the batch stay alive while simulating so their ids are unique
+            self._assets_by_actor[id(actor)] = asset
+            return asset
+
         def _create_viewer(self) -> gymapi.Viewer:
             # TODO provide some sensible default and make configurable
             viewer = self._gym.create_viewer(self._sim, gymapi.CameraProperties())
@@ -204,8 +354,22 @@ class LocalRunner(Runner):
 
             return viewer
 
-        def run(self) -> List[RunnerState]:
-            states: List[RunnerState] = []
+        def run(
+            self,
+            result_times: npt.NDArray[np.float64],
+            result_poses: npt.NDArray[np.float32],
+        ) -> Tuple[int, List[npt.NDArray[np.float_]]]:
+            """
+            Run the batch, writing recorded states to the provided buffers.
+
+            :param result_times: (max samples,) buffer for the time of every recorded sample.
+            :param result_poses: (max samples, environments, max actors, 7) buffer for the actor poses of every recorded sample.
+            :returns: (the number of recorded samples, values of the batch reductions)
+            """
+            num_recorded = 0
+            record_all = not self._batch.endpoints_only
+            # intermediate samples are only required when recording them or to update reductions
+            sample_intermediate = record_all or len(self._batch.reductions) > 0
 
             control_step = 1 / self._batch.control_frequency
             sample_step = 1 / self._batch.sampling_frequency
@@ -214,7 +378,9 @@ class LocalRunner(Runner):
             last_sample_time = 0.0
 
             # sample initial state
-            states.append(self._get_state(0.0))
+            self._take_sample()
+            self._record_sample(0.0, num_recorded, result_times, result_poses)
+            num_recorded += 1
 
             while (
                 time := self._gym.get_sim_time(self._sim)
@@ -222,26 +388,25 @@ class LocalRunner(Runner):
                 # do control if it is time
                 if time >= last_control_time + control_step:
                     last_control_time = math.floor(time / control_step) * control_step
-                    control = ActorControl()
-                    self._batch.control(control_step, control)
-
-                    for (env_index, actor_index, targets) in control._dof_targets:
-                        env_handle = self._gymenvs[env_index].env
-                        actor_handle = self._gymenvs[env_index].actors[actor_index]
-                        actor = (
-                            self._batch.environments[env_index]
-                            .actors[actor_index]
-                            .actor
-                        )
-
-                        self.set_actor_dof_position_targets(
-                            env_handle, actor_handle, actor, targets
+                    if self._dof_targets_source is None:
+                        control = ActorControl()
+                        self._batch.control(control_step, control)
+                        self._apply_dof_targets(control)
+                    else:
+                        self._dof_targets[self._dof_order] = self._dof_targets_source(
+                            control_step
                         )
+                        self._write_dof_targets()
 
                 # sample state if it is time
-                if time >= last_sample_time + sample_step:
+                if sample_intermediate and time >= last_sample_time + sample_step:
                     last_sample_time = int(time / sample_step) * sample_step
-                    states.append(self._get_state(time))
+                    self._take_sample()
+                    if record_all:
+                        self._record_sample(
+                            time, num_recorded, result_times, result_poses
+                        )
+                        num_recorded += 1
 
                 # step simulation
                 self._gym.simulate(self._sim)
@@ -252,9 +417,11 @@ class LocalRunner(Runner):
                     self._gym.draw_viewer(self._viewer, self._sim, False)
 
             # sample one final time
-            states.append(self._get_state(time))
+            self._take_sample()
+            self._record_sample(time, num_recorded, result_times, result_poses)
+            num_recorded += 1
 
-            return states
+            return num_recorded, self._reduction_values
 
         def set_actor_dof_position_targets(
             self,
@@ -283,6 +450,31 @@ class LocalRunner(Runner):
                 targets,
             )
 
+        def _apply_dof_targets(self, control: ActorControl) -> None:
+            """
+            Write the dof targets of all actors to the sim in a single call.
+            Actors that are not controlled keep their previous targets.
+            """
+            for env_index, actor_index, targets in control._dof_targets:
+                start, num_dofs = self._dof_slices[env_index][actor_index]
+                if len(targets) != num_dofs:
+                    raise RuntimeError("Need to set a target for every dof")
+                self._dof_targets[start : start + num_dofs] = targets
+            self._write_dof_targets()
+
+        def _write_dof_targets(self) -> None:
+            """
+            Write `_dof_targets` to the sim.
+            """
+            if np.any(np.abs(self._dof_targets) > self._dof_ranges):
+                raise RuntimeError("Dof targets must lie within the joints range.")
+
+            # isaac gym does not understand zero length arrays...
+            if len(self._dof_targets) != 0:
+                self._gym.set_dof_position_target_tensor(
+                    self._sim, gymtorch.unwrap_tensor(self._dof_targets_tensor)
+                )
+
         def set_actor_dof_positions(
             self,
             env_handle: gymapi.Env,
@@ -310,40 +502,358 @@ class LocalRunner(Runner):
                 self._gym.destroy_viewer(self._viewer)
             self._gym.destroy_sim(self._sim)
 
-        def _get_state(self, time: float) -> RunnerState:
-            state = RunnerState(time, [])
-
-            for gymenv in self._gymenvs:
-                env_state = EnvironmentState([])
-                for actor_handle in gymenv.actors:
-                    pose = self._gym.get_actor_rigid_body_states(
-                        gymenv.env, actor_handle, gymapi.STATE_POS
-                    )["pose"]
-                    position = pose["p"][0]  # [0] is center of root element
-                    orientation = pose["r"][0]
-                    env_state.actor_states.append(
-                        ActorState(
-                            Vector3([position[0], position[1], position[2]]),
-                            Quaternion(
-                                [
-                                    orientation[0],
-                                    orientation[1],
-                                    orientation[2],
-                                    orientation[3],
-                                ]
-                            ),
-                        )
+        def _sample_poses(self) -> npt.NDArray[np.float32]:
+            """
+            Read the root pose of all actors in a single call.
+
+            :returns: The preallocated pose buffer, one row per actor, env by env.
+                      Columns are position(xyz) and orientation(xyzw).
+                      Overwritten the next time poses are sampled.
+            """
+            self._gym.refresh_actor_root_state_tensor(self._sim)
+            np.take(
+                self._root_states[:, 0:7],
+                self._root_state_indices,
+                axis=0,
+                out=self._poses,
+            )
+            return self._poses
+
+        def _take_sample(self) -> None:
+            """
+            Sample the poses of all actors and update the batch reductions.
+            """
+            self._previous_poses, self._current_poses = (
+                self._current_poses,
+                self._previous_poses,
+            )
+            self._current_poses[self._pose_env_indices, self._pose_actor_indices] = (
+                self._sample_poses()
+            )
+
+            if self._num_samples == 0:
+                self._reduction_values = [
+                    reduction.initial(self._current_poses)
+                    for reduction in self._batch.reductions
+                ]
+            else:
+                for reduction, values in zip(
+                    self._batch.reductions, self._reduction_values
+                ):
+                    reduction.update(values, self._previous_poses, self._current_poses)
+            self._num_samples += 1
+
+        def _record_sample(
+            self,
+            time: float,
+            sample_index: int,
+            result_times: npt.NDArray[np.float64],
+            result_poses: npt.NDArray[np.float32],
+        ) -> None:
+            """
+            Write the last taken sample to the results.
+            """
+            if sample_index >= len(result_times):
+                raise RuntimeError("More samples were taken than fit in the results.")
+
+            # results can have room for more actors than this simulator, when it is a shard of a larger batch.
+            num_actor_slots = self._current_poses.shape[1]
+            result_times[sample_index] = time
+            result_poses[sample_index, :, :num_actor_slots] = self._current_poses
+            result_poses[sample_index, :, num_actor_slots:] = np.nan
+
+    class _BatchDofTargets:
+        """
+        Dof targets of all actors in a batch, in a single array, env by env, actor by actor.
+        Used to do control in the parent process, so the targets of a shard can be sent as a single array.
+        """
+
+        targets: npt.NDArray[np.float32]
+        _actor_slices: List[
+            List[Tuple[int, int]]
+        ]  # (index of first dof in `targets`, number of dofs) of every actor in every env
+        _env_offsets: List[
+            int
+        ]  # index of the first dof of every env in `targets`, followed by the number of dofs
+
+        def __init__(self, environments: List[Environment]) -> None:
+            self._actor_slices = []
+            self._env_offsets = [0]
+            initial_targets: List[float] = []
+            for env in environments:
+                env_slices: List[Tuple[int, int]] = []
+                for posed_actor in env.actors:
+                    env_slices.append(
+                        (len(initial_targets), len(posed_actor.actor.joints))
                     )
-                state.envs.append(env_state)
+                    initial_targets += posed_actor.dof_states
+                self._actor_slices.append(env_slices)
+                self._env_offsets.append(len(initial_targets))
+            # the sim starts at the initial dof states, which are kept until an actor is controlled
+            self.targets = np.array(initial_targets, dtype=np.float32)
+
+        def apply(self, control: ActorControl) -> None:
+            for env_index, actor_index, targets in control._dof_targets:
+                if not 0 <= env_index < len(self._actor_slices):
+                    raise RuntimeError("Environment index out of range.")
+                if not 0 <= actor_index < len(self._actor_slices[env_index]):
+                    raise RuntimeError("Actor index out of range.")
+                start, num_dofs = self._actor_slices[env_index][actor_index]
+                if len(targets) != num_dofs:
+                    raise RuntimeError("Need to set a target for every dof")
+                self.targets[start : start + num_dofs] = targets
+
+        def get_shard(self, start_env: int, end_env: int) -> npt.NDArray[np.float32]:
+            """
+            Get the targets of a contiguous range of environments.
+
+            :returns: A view of the targets.
+            """
+            return self.targets[
+                self._env_offsets[start_env] : self._env_offsets[end_env]
+            ]
+
+    @dataclass
+    class _Job:
+        """
+        Everything a worker needs to simulate (a shard of) a batch, except for the control function.
+        Control is done by the worker itself when it was forked with the control function,
+        and otherwise by the parent process, on request of the worker.
+        """
+
+        simulation_time: int
+        sampling_frequency: float
+        control_frequency: float
+        endpoints_only: bool
+        reductions: List[StateReduction]
+        environments: List[Environment]
+        result_buffer: LocalRunner._ResultBuffer
+        env_offset: int  # index in the batch and result buffer of the first environment
+        num_batch_environments: int  # number of environments in the whole batch
+
+    @dataclass
+    class _ResultBuffer:
+        """
+        A file in shared memory that a worker writes sampled states into.
+        The parent maps it, so results never have to be pickled and sent through a pipe.
+        Layout is the sample times as float64, followed by the poses as float32.
+        """
+
+        path: str
+        max_samples: int
+        num_envs: int
+        max_actors: int
+
+        # on linux /dev/shm is backed by memory. otherwise fall back to a normal temporary file.
+        _DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
 
-            return state
+        @classmethod
+        def create(cls, batch: Batch) -> LocalRunner._ResultBuffer:
+            # the initial and final sample, plus one every sampling period.
+            # a sample can be taken twice in a period due to rounding errors, so reserve double.
+            # the file is sparse, so unused space does not take memory.
+            if batch.endpoints_only:
+                max_samples = 2
+            else:
+                max_samples = (
+                    2 * math.ceil(batch.simulation_time * batch.sampling_frequency) + 3
+                )
+            max_actors = max((len(env.actors) for env in batch.environments), default=0)
+
+            fd, path = tempfile.mkstemp(
+                prefix="revolve2_isaacgym_", suffix=".results", dir=cls._DIR
+            )
+            buffer = cls(path, max_samples, len(batch.environments), max_actors)
+            os.ftruncate(fd, buffer._poses_offset + buffer._poses_size)
+            os.close(fd)
+            return buffer
+
+        @property
+        def _poses_offset(self) -> int:
+            return self.max_samples * np.dtype(np.float64).itemsize
+
+        @property
+        def _poses_size(self) -> int:
+            return (
+                self.max_samples
+                * self.num_envs
+                * self.max_actors
+                * 7
+                * np.dtype(np.float32).itemsize
+            )
+
+        def map(
+            self, mode: Literal["r+", "c"]
+        ) -> Tuple[npt.NDArray[np.float64], npt.NDArray[np.float32]]:
+            """
+            Map the buffer into memory.
+
+            :param mode: See `numpy.memmap`.
+            :returns: (sample times, poses) arrays backed by the buffer.
+            """
+            times = np.memmap(
+                self.path, dtype=np.float64, mode=mode, shape=(self.max_samples,)
+            )
+            poses = np.memmap(
+                self.path,
+                dtype=np.float32,
+                mode=mode,
+                offset=self._poses_offset,
+                shape=(self.max_samples, self.num_envs, self.max_actors, 7),
+            )
+            return times, poses
+
+        def remove(self) -> None:
+            """
+            Remove the file. Existing mappings stay valid.
+            """
+            os.remove(self.path)
+
+    # messages sent from a worker to the parent process
+    # (_MSG_CONTROL, dt). parent answers with the float32 targets of all dofs in the shard,
+    # env by env, actor by actor, as raw bytes.
+    _MSG_CONTROL = 0
+    # (_MSG_DONE, number of samples recorded, reduction values, rss in bytes)
+    _MSG_DONE = 1
+    _MSG_ERROR = 2  # (_MSG_ERROR, formatted traceback)
+
+    class _Worker:
+        """
+        A long-lived simulator subprocess.
+        Batches are sent to it over a pipe, one at a time.
+
+        A worker forked with a control function does control itself, without communicating with the parent.
+        Such a worker can only run batches with that control function.
+        """
+
+        _process: mp.Process
+        _connection: Connection
+        num_batches: int  # number of batches this worker has run
+        rss: int  # resident set size of the worker after its last batch, in bytes
+
+        def __init__(
+            self,
+            sim_params: gymapi.SimParams,
+            headless: bool,
+            control: Optional[Callable[[float, ActorControl], None]] = None,
+        ) -> None:
+            self._connection, worker_connection = mp.Pipe()
+            # isaac gym only runs on linux, where processes are forked,
+            # so the control function does not have to be picklable.
+            self._process = mp.Process(
+                target=LocalRunner._worker_main,
+                args=(worker_connection, sim_params, headless, control),
+                daemon=True,
+            )
+            self._process.start()
+            worker_connection.close()
+
+            self.num_batches = 0
+            self.rss = 0
+
+        def start_job(self, job: LocalRunner._Job) -> None:
+            self._connection.send(job)
+
+        def send_dof_targets(self, dof_targets: npt.NDArray[np.float32]) -> None:
+            """
+            Answer a control request.
+
+            :param dof_targets: Targets of all dofs in the shard of the worker, env by env, actor by actor.
+            """
+            self._connection.send_bytes(dof_targets)
+
+        async def recv(self) -> Tuple[Any, ...]:
+            """
+            Receive the next control request or job result.
+            Waits without blocking the event loop, so other coroutines can run while simulating.
+
+            :returns: A `_MSG_CONTROL` or `_MSG_DONE` message.
+            :raises RuntimeError: If the job failed or the worker died.
+            """
+            if not self._connection.poll():
+                await self._wait_readable()
+
+            try:
+                message: Tuple[Any, ...] = self._connection.recv()
+            except EOFError as err:
+                raise RuntimeError("Simulator worker exited unexpectedly.") from err
+
+            if message[0] == LocalRunner._MSG_ERROR:
+                raise RuntimeError(
+                    f"Simulator worker failed with the following error:\n{message[1]}"
+                )
+            if message[0] == LocalRunner._MSG_DONE:
+                self.num_batches += 1
+                self.rss = message[3]
+            return message
+
+        async def _wait_readable(self) -> None:
+            loop = asyncio.get_running_loop()
+            fd = self._connection.fileno()
+            readable = loop.create_future()
+
+            def on_readable() -> None:
+                loop.remove_reader(fd)
+                if not readable.done():
+                    readable.set_result(None)
+
+            loop.add_reader(fd, on_readable)
+            try:
+                await readable
+            finally:
+                loop.remove_reader(fd)
+
+        def stop(self) -> None:
+            try:
+                self._connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass  # worker is already gone
+            self._process.join()
+            self._connection.close()
+
+        def kill(self) -> None:
+            """
+            Stop the worker immediately, also when it is in the middle of a job.
+            """
+            self._process.kill()
+            self._process.join()
+            self._connection.close()
 
     _sim_params: gymapi.SimParams
     _headless: bool
+    _worker_max_batches: int
+    _worker_max_rss: Optional[int]
+    _num_processes: int
+    _idle_workers: List[_Worker]
+
+    def __init__(
+        self,
+        sim_params: gymapi.SimParams,
+        headless: bool = False,
+        worker_max_batches: int = 1,
+        worker_max_rss: Optional[int] = None,
+        num_processes: int = 1,
+    ):
+        """
+        :param sim_params: Isaac Gym simulation parameters. See `SimParams` for sensible defaults.
+        :param headless: If True, no viewer is created.
+        :param worker_max_batches: Number of batches a simulator worker process runs before it is replaced by a fresh one.
+                                   The default of 1 starts a new process for every batch.
+                                   Isaac Gym leaks memory, so workers cannot live forever.
+        :param worker_max_rss: If set, a worker is also replaced as soon as its resident memory exceeds this amount of bytes.
+        :param num_processes: Number of simulator processes a batch is split over.
+                              The environments are divided evenly and simulated concurrently.
+                              Each process simulates on a single thread, so a sensible value is the number of cpu cores.
+        """
+        assert worker_max_batches >= 1
+        assert num_processes >= 1
 
-    def __init__(self, sim_params: gymapi.SimParams, headless: bool = False):
         self._sim_params = sim_params
         self._headless = headless
+        self._worker_max_batches = worker_max_batches
+        self._worker_max_rss = worker_max_rss
+        self._num_processes = num_processes
+        self._idle_workers = []
 
     @staticmethod
     def SimParams() -> gymapi.SimParams:
@@ -361,36 +871,237 @@ class LocalRunner(Runner):
 
         return sim_params
 
-    async def run_batch(self, batch: Batch) -> List[RunnerState]:
+    async def run_batch(self, batch: Batch) -> BatchResults:
         # sadly we must run Isaac Gym in a subprocess, because it has some big memory leaks.
-        result_queue: mp.Queue = mp.Queue()  # type: ignore # TODO
-        process = mp.Process(
-            target=self._run_batch_impl,
-            args=(result_queue, batch, self._sim_params, self._headless),
+        # workers are reused for multiple batches until they have run too many or use too much memory.
+        # the environments are split in contiguous shards, one per worker.
+        num_shards = max(1, min(self._num_processes, len(batch.environments)))
+        shard_sizes = [
+            len(batch.environments) // num_shards
+            + (1 if i < len(batch.environments) % num_shards else 0)
+            for i in range(num_shards)
+        ]
+        shard_offsets = [0] + list(itertools.accumulate(shard_sizes))
+
+        if self._worker_max_batches == 1:
+            # every worker runs a single batch, so it can be forked with the control function of the batch,
+            # which lets it do control without communicating with this process.
+            workers = [
+                self._Worker(self._sim_params, self._headless, batch.control)
+                for _ in range(num_shards)
+            ]
+        else:
+            workers = [
+                (
+                    self._idle_workers.pop()
+                    if len(self._idle_workers) > 0
+                    else self._Worker(self._sim_params, self._headless)
+                )
+                for _ in range(num_shards)
+            ]
+
+        try:
+            results = await self._run_shards(batch, workers, shard_offsets)
+        except BaseException:
+            # other workers can be halfway their shard, waiting for control that will never come.
+            for worker in workers:
+                worker.kill()
+            raise
+
+        for worker in workers:
+            if worker.num_batches >= self._worker_max_batches or (
+                self._worker_max_rss is not None and worker.rss > self._worker_max_rss
+            ):
+                worker.stop()
+            else:
+                self._idle_workers.append(worker)
+
+        return results
+
+    async def _run_shards(
+        self, batch: Batch, workers: List[_Worker], shard_offsets: List[int]
+    ) -> BatchResults:
+        """
+        Run a batch on a set of workers, each simulating a contiguous range of environments.
+        All workers write to the same result buffer, each to the part of their environments.
+
+        Workers that do control themselves run independently.
+        Otherwise they simulate in lockstep, as they all ask for control at the same simulation times.
+        Control is then done once for the whole batch, after which every shard is sent its part of the targets.
+
+        :param batch: The batch to run.
+        :param workers: The workers to run it on, one per shard.
+        :param shard_offsets: Index of the first environment of every shard, followed by the total number of environments.
+        :returns: The results of the whole batch.
+        """
+        result_buffer = self._ResultBuffer.create(batch)
+        try:
+            for worker, start, end in zip(
+                workers, shard_offsets[:-1], shard_offsets[1:]
+            ):
+                worker.start_job(
+                    self._Job(
+                        batch.simulation_time,
+                        batch.sampling_frequency,
+                        batch.control_frequency,
+                        batch.endpoints_only,
+                        batch.reductions,
+                        batch.environments[start:end],
+                        result_buffer,
+                        start,
+                        len(batch.environments),
+                    )
+                )
+
+            dof_targets: Optional[LocalRunner._BatchDofTargets] = None
+            while True:
+                messages = [await worker.recv() for worker in workers]
+                if any(message[0] != messages[0][0] for message in messages):
+                    raise RuntimeError("Simulator workers went out of sync.")
+                if messages[0][0] == self._MSG_DONE:
+                    break
+
+                if dof_targets is None:
+                    dof_targets = self._BatchDofTargets(batch.environments)
+                control = ActorControl()
+                batch.control(messages[0][1], control)
+                dof_targets.apply(control)
+
+                for worker, start, end in zip(
+                    workers, shard_offsets[:-1], shard_offsets[1:]
+                ):
+                    worker.send_dof_targets(dof_targets.get_shard(start, end))
+
+            # all shards sample at the same simulation times, so they wrote identical times
+            num_samples = messages[0][1]
+            if any(message[1] != num_samples for message in messages):
+                raise RuntimeError("Simulator workers went out of sync.")
+
+            # copy on write, so the results can be modified like any other array.
+            times, poses = result_buffer.map("c")
+        finally:
+            result_buffer.remove()
+
+        max_actors = poses.shape[2]
+        reductions = [
+            np.concatenate(
+                [
+                    np.pad(
+                        values,
+                        ((0, 0), (0, max_actors - values.shape[1])),
+                        constant_values=np.nan,
+                    )
+                    for values in shard_values
+                ]
+            )
+            for shard_values in zip(*(message[2] for message in messages))
+        ]
+
+        return BatchResults(
+            times[:num_samples],
+            poses[:num_samples],
+            [len(env.actors) for env in batch.environments],
+            reductions,
         )
-        process.start()
-        states = []
-        # states are sent state by state(every sample)
-        # because sending all at once is too big for the queue.
-        # should be good enough for now.
-        # if the program hangs here in the future,
-        # improve the way the results are passed back to the parent program.
-        while (state := result_queue.get()) is not None:
-            states.append(state)
-        process.join()
-        return states
+
+    def close(self) -> None:
+        """
+        Stop all idle simulator workers.
+        The runner can still be used afterwards; new workers are started when required.
+        """
+        for worker in self._idle_workers:
+            worker.stop()
+        self._idle_workers = []
 
     @classmethod
-    def _run_batch_impl(
+    def _worker_main(
         cls,
-        result_queue: mp.Queue,  # type: ignore # TODO
-        batch: Batch,
+        connection: Connection,
         sim_params: gymapi.SimParams,
         headless: bool,
+        control: Optional[Callable[[float, ActorControl], None]],
     ) -> None:
-        _Simulator = cls._Simulator(batch, sim_params, headless)
-        states = _Simulator.run()
-        _Simulator.cleanup()
-        for state in states:
-            result_queue.put(state)
-        result_queue.put(None)
+        while (job := connection.recv()) is not None:
+            try:
+                batch = Batch(
+                    simulation_time=job.simulation_time,
+                    sampling_frequency=job.sampling_frequency,
+                    control_frequency=job.control_frequency,
+                    control=cls._make_shard_control(job, control),
+                    endpoints_only=job.endpoints_only,
+                    reductions=job.reductions,
+                )
+                batch.environments = job.environments
+
+                result_times, result_poses = job.result_buffer.map("r+")
+                result_poses = result_poses[
+                    :, job.env_offset : job.env_offset + len(job.environments)
+                ]
+
+                if control is None:
+                    dof_targets_source = cls._make_dof_targets_receiver(connection, job)
+                else:
+                    dof_targets_source = None
+                simulator = cls._Simulator(
+                    batch, sim_params, headless, dof_targets_source
+                )
+                num_samples, reductions = simulator.run(result_times, result_poses)
+                simulator.cleanup()
+
+                del result_times, result_poses  # unmap
+            except Exception:
+                connection.send((cls._MSG_ERROR, traceback.format_exc()))
+                continue
+            connection.send((cls._MSG_DONE, num_samples, reductions, cls._get_rss()))
+
+    @staticmethod
+    def _make_shard_control(
+        job: LocalRunner._Job, control: Optional[Callable[[float, ActorControl], None]]
+    ) -> Callable[[float, ActorControl], None]:
+        """
+        Make a control function for the shard of a job,
+        that runs the control function of the whole batch and keeps the targets of the environments in the shard.
+        """
+
+        def shard_control(dt: float, actor_control: ActorControl) -> None:
+            assert control is not None  # otherwise dof targets are received instead
+            batch_control = ActorControl()
+            control(dt, batch_control)
+            for env_index, actor_index, targets in batch_control._dof_targets:
+                if not 0 <= env_index < job.num_batch_environments:
+                    raise RuntimeError("Environment index out of range.")
+                if 0 <= env_index - job.env_offset < len(job.environments):
+                    actor_control.set_dof_targets(
+                        env_index - job.env_offset, actor_index, targets
+                    )
+
+        return shard_control
+
+    @classmethod
+    def _make_dof_targets_receiver(
+        cls, connection: Connection, job: LocalRunner._Job
+    ) -> Callable[[float], npt.NDArray[np.float32]]:
+        """
+        Make a function that requests the dof targets of the shard of a job from the parent process.
+        """
+        dof_targets = np.empty(
+            sum(
+                len(posed_actor.actor.joints)
+                for env in job.environments
+                for posed_actor in env.actors
+            ),
+            dtype=np.float32,
+        )
+
+        def receive_dof_targets(dt: float) -> npt.NDArray[np.float32]:
+            connection.send((cls._MSG_CONTROL, dt))
+            connection.recv_bytes_into(dof_targets)
+            return dof_targets
+
+        return receive_dof_targets
+
+    @staticmethod
+    def _get_rss() -> int:
+        # isaac gym only runs on linux so we can rely on procfs
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
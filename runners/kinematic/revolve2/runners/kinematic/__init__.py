@@ -0,0 +1,3 @@
+from ._kinematic_runner import KinematicRunner
+
+__all__ = ["KinematicRunner"]
@@ -0,0 +1,233 @@
+from typing import List
+
+import numpy as np
+import numpy.typing as npt
+
+from revolve2.core.physics.running import ActorControl, Batch, BatchResults, Runner
+
+
+class KinematicRunner(Runner):
+    """
+    Runner that moves actors using a simple kinematic model instead of a physics engine.
+
+    It runs in process, only depends on numpy and is fully deterministic,
+    so it can be used to benchmark and regression test everything around the simulator
+    on machines without Isaac Gym. The resulting movement is not physically accurate.
+
+    Every dof moves towards its target at the maximum velocity of its joint.
+    A joint pushes its actor over the ground while its dof is below zero,
+    moving the actor opposite to the motion of the joint around the actor's origin.
+    Cyclic gaits therefore result in net displacement, like a rowing motion.
+    Actors keep their height and orientation and do not interact with each other.
+    """
+
+    class _Simulation:
+        _batch: Batch
+        _dt: float
+        _stride: float
+
+        _num_actors: List[int]  # number of actors in every environment
+        _actor_offsets: npt.NDArray[np.int64]  # index of first actor of every env
+        _actor_poses: npt.NDArray[
+            np.float_
+        ]  # position and orientation(xyzw) of every actor, env by env
+        _pose_env_indices: npt.NDArray[np.int64]  # env index of every actor
+        _pose_actor_indices: npt.NDArray[np.int64]  # actor index in env of every actor
+
+        _dof_actors: npt.NDArray[np.int64]  # actor of every dof in the batch
+        _dof_offsets: npt.NDArray[np.int64]  # index of first dof of every actor
+        _dof_positions: npt.NDArray[np.float_]
+        _dof_targets: npt.NDArray[np.float_]
+        _dof_ranges: npt.NDArray[np.float_]
+        _dof_max_steps: npt.NDArray[np.float_]  # maximum dof movement per step
+        _dof_levers: npt.NDArray[
+            np.float_
+        ]  # (dofs, 2) planar movement of the actor per radian of dof movement, in world coordinates
+
+        _time_seconds: List[float]
+        _poses: List[npt.NDArray[np.float_]]
+        _previous_poses: npt.NDArray[np.float_]
+        _num_samples: int  # number of samples taken so far, including unrecorded ones
+        _reduction_values: List[npt.NDArray[np.float_]]
+
+        def __init__(self, batch: Batch, dt: float, stride: float) -> None:
+            self._batch = batch
+            self._dt = dt
+            self._stride = stride
+
+            posed_actors = [
+                posed_actor for env in batch.environments for posed_actor in env.actors
+            ]
+            for posed_actor in posed_actors:
+                if len(posed_actor.dof_states) != len(posed_actor.actor.joints):
+                    raise RuntimeError("Need to set a position for every dof")
+
+            self._num_actors = [len(env.actors) for env in batch.environments]
+            self._actor_offsets = np.cumsum([0] + self._num_actors)
+            self._actor_poses = np.array(
+                [
+                    [*posed_actor.position, *posed_actor.orientation]
+                    for posed_actor in posed_actors
+                ],
+                dtype=np.float64,
+            ).reshape(len(posed_actors), 7)
+            self._pose_env_indices = np.repeat(
+                np.arange(len(self._num_actors)), self._num_actors
+            )
+            self._pose_actor_indices = np.concatenate(
+                [np.arange(n) for n in self._num_actors] + [np.zeros(0, dtype=np.int64)]
+            )
+
+            num_dofs = [len(posed_actor.actor.joints) for posed_actor in posed_actors]
+            joints = [
+                (posed_actor, joint)
+                for posed_actor in posed_actors
+                for joint in posed_actor.actor.joints
+            ]
+            self._dof_actors = np.repeat(np.arange(len(posed_actors)), num_dofs)
+            self._dof_offsets = np.cumsum([0] + num_dofs)
+            self._dof_positions = np.array(
+                [pos for posed_actor in posed_actors for pos in posed_actor.dof_states],
+                dtype=np.float64,
+            )
+            self._dof_targets = self._dof_positions.copy()
+            self._dof_ranges = np.array(
+                [joint.range for _, joint in joints], dtype=np.float64
+            )
+            self._dof_max_steps = dt * np.array(
+                [joint.velocity for _, joint in joints], dtype=np.float64
+            )
+            self._dof_levers = np.array(
+                [
+                    list(
+                        posed_actor.orientation
+                        * (joint.orientation * joint.axis).cross(joint.position)
+                    )[0:2]
+                    for posed_actor, joint in joints
+                ],
+                dtype=np.float64,
+            ).reshape(len(joints), 2)
+
+            self._time_seconds = []
+            self._poses = []
+            self._num_samples = 0
+            self._reduction_values = []
+
+        def run(self) -> BatchResults:
+            record_all = not self._batch.endpoints_only
+            # intermediate samples are only required when recording them or to update reductions
+            sample_intermediate = record_all or len(self._batch.reductions) > 0
+
+            control_step = 1 / self._batch.control_frequency
+            sample_step = 1 / self._batch.sampling_frequency
+
+            last_control_time = 0.0
+            last_sample_time = 0.0
+
+            # sample initial state
+            self._take_sample(0.0, True)
+
+            # time is calculated from the step count so it does not accumulate rounding errors
+            step = 0
+            while (time := step * self._dt) < self._batch.simulation_time:
+                # do control if it is time
+                if time >= last_control_time + control_step:
+                    last_control_time = int(time / control_step) * control_step
+                    control = ActorControl()
+                    self._batch.control(control_step, control)
+                    self._apply_dof_targets(control)
+
+                # sample state if it is time
+                if sample_intermediate and time >= last_sample_time + sample_step:
+                    last_sample_time = int(time / sample_step) * sample_step
+                    self._take_sample(time, record_all)
+
+                self._step()
+                step += 1
+
+            # sample one final time
+            self._take_sample(time, True)
+
+            return BatchResults(
+                np.array(self._time_seconds),
+                np.stack(self._poses),
+                self._num_actors,
+                self._reduction_values,
+            )
+
+        def _apply_dof_targets(self, control: ActorControl) -> None:
+            for env_index, actor_index, targets in control._dof_targets:
+                if not (
+                    0 <= env_index < len(self._num_actors)
+                    and 0 <= actor_index < self._num_actors[env_index]
+                ):
+                    raise RuntimeError("Actor index out of range.")
+                actor = self._actor_offsets[env_index] + actor_index
+                start = self._dof_offsets[actor]
+                end = self._dof_offsets[actor + 1]
+                if len(targets) != end - start:
+                    raise RuntimeError("Need to set a target for every dof")
+                self._dof_targets[start:end] = targets
+
+            if np.any(np.abs(self._dof_targets) > self._dof_ranges):
+                raise RuntimeError("Dof targets must lie within the joints range.")
+
+        def _step(self) -> None:
+            dof_steps = np.clip(
+                self._dof_targets - self._dof_positions,
+                -self._dof_max_steps,
+                self._dof_max_steps,
+            )
+            stance = self._dof_positions < 0.0
+            self._dof_positions += dof_steps
+
+            pushes = (
+                -self._stride * (dof_steps * stance)[:, np.newaxis] * self._dof_levers
+            )
+            for axis in range(2):
+                self._actor_poses[:, axis] += np.bincount(
+                    self._dof_actors,
+                    weights=pushes[:, axis],
+                    minlength=len(self._actor_poses),
+                )
+
+        def _take_sample(self, time: float, record: bool) -> None:
+            """
+            Sample the poses of all actors, update the batch reductions and optionally record the sample.
+            """
+            poses = np.full(
+                (len(self._num_actors), max(self._num_actors, default=0), 7), np.nan
+            )
+            poses[self._pose_env_indices, self._pose_actor_indices] = self._actor_poses
+
+            if self._num_samples == 0:
+                self._reduction_values = [
+                    reduction.initial(poses) for reduction in self._batch.reductions
+                ]
+            else:
+                for reduction, values in zip(
+                    self._batch.reductions, self._reduction_values
+                ):
+                    reduction.update(values, self._previous_poses, poses)
+            self._previous_poses = poses
+            self._num_samples += 1
+
+            if record:
+                self._time_seconds.append(time)
+                self._poses.append(poses)
+
+    _dt: float
+    _stride: float
+
+    def __init__(self, dt: float = 0.02, stride: float = 1.0) -> None:
+        """
+        :param dt: Seconds per simulation step. Control and sampling happen at multiples of this.
+        :param stride: Scale of the displacement caused by joint movement.
+        """
+        assert dt > 0.0
+
+        self._dt = dt
+        self._stride = stride
+
+    async def run_batch(self, batch: Batch) -> BatchResults:
+        return self._Simulation(batch, self._dt, self._stride).run()
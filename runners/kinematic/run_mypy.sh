@@ -0,0 +1,5 @@
+#!/bin/sh
+
+cd "$(dirname "$0")"
+echo "runners/kinematic:"
+mypy -p revolve2
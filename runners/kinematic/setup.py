@@ -0,0 +1,25 @@
+import os.path
+import pathlib
+
+from setuptools import find_namespace_packages, setup
+
+revolve2_path = pathlib.Path(__file__).parent.parent.parent.resolve()
+
+setup(
+    name="revolve2-runners-kinematic",
+    version="0.2.4-alpha3",
+    description="Deterministic kinematic runner for Revolve2",
+    author="Computational Intelligence Group Vrije Universiteit",
+    url="https://github.com/ci-group/revolve2",
+    packages=find_namespace_packages(),
+    package_data={
+        "revolve2.runners.kinematic": ["py.typed"],
+    },
+    install_requires=[
+        f"revolve2-core @ file://{os.path.join(revolve2_path, 'core')}",
+        "numpy>=1.21.2",
+        "pyrr>=0.10.3",
+    ],
+    extras_require={"dev": []},
+    zip_safe=False,
+)